@@ -0,0 +1,46 @@
+"""Runs the bot's Flask app for the load driver, in its own process.
+
+Mails are suppressed, Celery tasks run eagerly and every SQL statement
+is counted, the count being served on /bench/stats together with the
+counters of the language cache.
+"""
+import os
+import threading
+
+
+def serve(port, env):
+    os.environ.update(env)
+
+    from flask import jsonify
+    from sqlalchemy import event
+    from werkzeug.serving import make_server
+
+    from app import app, celery, db, mail
+    from routes import dialog_manager
+
+    app.config['MAIL_SUPPRESS_SEND'] = True
+    mail.init_app(app)
+    celery.conf.task_always_eager = True
+
+    stats = {'queries': 0}
+    lock = threading.Lock()
+
+    def count_query(*args):
+        with lock:
+            stats['queries'] += 1
+
+    with app.app_context():
+        db.create_all()
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    @app.route('/bench/stats')
+    def bench_stats():
+        manager = dialog_manager.peek()
+        with lock:
+            return jsonify(dict(
+                stats,
+                language_cache=None if manager is None else
+                manager.engine.language_cache.stats
+            ))
+
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
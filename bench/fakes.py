@@ -0,0 +1,256 @@
+"""Local stand-ins for the services the bot talks to, each answering
+after a configurable latency:
+
+    Graph API: user profiles, the Send API and batches of Send API
+        requests
+    Telegram Bot API: every method, sendMessage answered with a message
+    Yandex Translate: language detection
+    Dialogflow: DetectIntent, DeleteAllContexts and ListIntents over
+        gRPC
+
+Replies sent by the bot to a user are counted in `Replies`, which lets
+the load driver wait for the answer to every message it sends.
+"""
+import json
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import grpc
+from dialogflow_v2.proto import (
+    context_pb2_grpc,
+    intent_pb2,
+    intent_pb2_grpc,
+    session_pb2,
+    session_pb2_grpc
+)
+from google.protobuf import empty_pb2
+
+from core.dialog.intents import INTENTS
+
+# first word of a free text message -> intent returned by Dialogflow
+DIALOGFLOW_INTENTS = {
+    'hi': 'greeting',
+    'hello': 'greeting',
+    'hey': 'greeting',
+    'hola': 'greeting',
+    'buenas': 'greeting',
+    'thanks': 'thanks',
+    'gracias': 'thanks',
+}
+SPANISH_HINTS = ('hola', 'gracias', 'quiero', 'tengo', 'buscar', 'ayuda',
+                 'si', 'vuelo', 'necesito', 'por', 'favor', 'mi', 'una')
+
+
+class Replies:
+    """Number of reply messages received by every (channel, user)."""
+
+    def __init__(self):
+        self.counts = {}
+        self.condition = threading.Condition()
+
+    def record(self, channel, recipient_id):
+        key = (channel, str(recipient_id))
+        with self.condition:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.condition.notify_all()
+
+    def count(self, channel, recipient_id):
+        with self.condition:
+            return self.counts.get((channel, str(recipient_id)), 0)
+
+    def wait(self, channel, recipient_id, seen, timeout):
+        """Wait until more than `seen` replies were received, returns
+        whether they were."""
+        key = (channel, str(recipient_id))
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.counts.get(key, 0) > seen, timeout)
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    # keep-alive, like the real APIs
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if not body:
+            return {}
+        if self.headers.get('Content-Type', '').startswith(
+                'application/json'):
+            return json.loads(body)
+        return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        self.send_json(*self.get(url.path, parse_qs(url.query)))
+
+    def do_POST(self):
+        body = self.read_body()
+        time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        self.send_json(*self.post(url.path, parse_qs(url.query), body))
+
+    def do_DELETE(self):
+        self.read_body()
+        time.sleep(self.server.latency)
+        self.send_json({'result': 'success'})
+
+    def get(self, path, query):
+        return {'error': {'message': 'Unknown path ' + path}}, 404
+
+    def post(self, path, query, body):
+        return {'error': {'message': 'Unknown path ' + path}}, 404
+
+
+class GraphAPIHandler(FakeHandler):
+    def get(self, path, query):
+        psid = path.rstrip('/').split('/')[-1]
+        return {
+            'id': psid,
+            'name': 'Bench User',
+            'first_name': 'Bench',
+            'last_name': 'User',
+            'locale': 'en_US' if int(psid[-1:] or 0) % 2 else 'es_ES'
+        }, 200
+
+    def post(self, path, query, body):
+        if path.endswith('/me/messages'):
+            return self.send(body), 200
+        if 'batch' in body:
+            answers = []
+            for item in json.loads(body['batch']):
+                fields = {k: json.loads(v[0]) if k != 'notification_type'
+                          else v[0] for k, v in parse_qs(item['body']).items()}
+                answers.append({'code': 200,
+                                'body': json.dumps(self.send(fields))})
+            return answers, 200
+        return {'result': 'success'}, 200
+
+    def send(self, body):
+        recipient_id = body.get('recipient', {}).get('id')
+        if 'message' in body:
+            self.server.replies.record('facebook', recipient_id)
+        return {'recipient_id': recipient_id, 'message_id': 'm_bench'}
+
+
+class TelegramHandler(FakeHandler):
+    def post(self, path, query, body):
+        method = path.rstrip('/').split('/')[-1]
+        if method != 'sendMessage':
+            return {'ok': True, 'result': True}, 200
+        chat_id = body.get('chat_id')
+        self.server.replies.record('telegram', chat_id)
+        return {'ok': True, 'result': {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': int(chat_id), 'type': 'private'},
+            'text': body.get('text', '')
+        }}, 200
+
+
+class YandexHandler(FakeHandler):
+    def post(self, path, query, body):
+        words = body.get('text', '').lower().split()
+        spanish = any(word in SPANISH_HINTS for word in words)
+        return {'code': 200, 'lang': 'es' if spanish else 'en'}, 200
+
+
+class FakeServer:
+    def __init__(self, handler, latency=0.0, replies=None):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.replies = replies
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.httpd.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever,
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+class SessionsServicer(session_pb2_grpc.SessionsServicer):
+    def __init__(self, latency):
+        self.latency = latency
+
+    def DetectIntent(self, request, context):
+        time.sleep(self.latency)
+        words = request.query_input.text.text.lower().split()
+        intent = DIALOGFLOW_INTENTS.get(words[0].strip('!?.,¡¿') if words
+                                        else '', 'Default Fallback Intent')
+        return session_pb2.DetectIntentResponse(
+            query_result=session_pb2.QueryResult(
+                query_text=request.query_input.text.text,
+                language_code=request.query_input.text.language_code,
+                intent=intent_pb2.Intent(display_name=intent)
+            )
+        )
+
+
+class ContextsServicer(context_pb2_grpc.ContextsServicer):
+    def __init__(self, latency):
+        self.latency = latency
+
+    def DeleteAllContexts(self, request, context):
+        time.sleep(self.latency)
+        return empty_pb2.Empty()
+
+
+class IntentsServicer(intent_pb2_grpc.IntentsServicer):
+    """Every intent of the bot, none of them setting output contexts,
+    so every button press is matched without Dialogflow."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def ListIntents(self, request, context):
+        time.sleep(self.latency)
+        return intent_pb2.ListIntentsResponse(intents=[
+            intent_pb2.Intent(display_name=name) for name in INTENTS
+        ])
+
+
+class FakeDialogflow:
+    def __init__(self, latency=0.0, workers=32):
+        self.server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=workers))
+        session_pb2_grpc.add_SessionsServicer_to_server(
+            SessionsServicer(latency), self.server)
+        context_pb2_grpc.add_ContextsServicer_to_server(
+            ContextsServicer(latency), self.server)
+        intent_pb2_grpc.add_IntentsServicer_to_server(
+            IntentsServicer(latency), self.server)
+        self.port = self.server.add_insecure_port('127.0.0.1:0')
+
+    @property
+    def endpoint(self):
+        return '127.0.0.1:{}'.format(self.port)
+
+    def start(self):
+        self.server.start()
+        return self
+
+    def stop(self):
+        self.server.stop(0)
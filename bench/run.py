@@ -0,0 +1,248 @@
+"""Webhook load test against local stand-ins of every external service.
+
+    python -m bench.run --conversations 200 --concurrency 50 \\
+        --latency-ms 50 --channels facebook,telegram --mode local
+
+Starts the fakes of bench.fakes, runs the app in a child process
+pointed at them (with a throw away SQLite database unless --database is
+given), replays a trace against /facebook-webhook and the Telegram
+token route and reports:
+
+    ack latency: time until the webhook answered
+    reply latency: time until the first reply reached the fake API
+    messages/sec over the whole replay
+    SQL statements per message
+    language cache hit rate
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bench.app_server import serve
+from bench.fakes import (
+    FakeDialogflow,
+    FakeServer,
+    GraphAPIHandler,
+    Replies,
+    TelegramHandler,
+    YandexHandler
+)
+from bench.traces import synthetic_trace, load_trace, dump_trace
+
+TELEGRAM_TOKEN = '123456:bench'
+FB_VERIFY_TOKEN = 'bench'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def cache_delta(before, after, counter):
+    # the language cache only exists once the first message was handled
+    counts = [(stats['language_cache'] or {}).get(counter, 0)
+              for stats in (before, after)]
+    return counts[1] - counts[0]
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * len(values))))]
+
+
+def fb_delivery(user, text, n):
+    timestamp = int(time.time() * 1000)
+    return {
+        'object': 'page',
+        'entry': [{
+            'id': 'bench-page',
+            'time': timestamp,
+            'messaging': [{
+                'sender': {'id': user},
+                'recipient': {'id': 'bench-page'},
+                'timestamp': timestamp,
+                'message': {'mid': 'm_{}_{}'.format(user, n), 'text': text}
+            }]
+        }]
+    }
+
+
+def telegram_update(user, text, n):
+    return {
+        'update_id': n,
+        'message': {
+            'message_id': n,
+            'date': int(time.time()),
+            'chat': {'id': user, 'type': 'private'},
+            'from': {'id': user, 'is_bot': False, 'first_name': 'Bench',
+                     'language_code': 'en'},
+            'text': text
+        }
+    }
+
+
+class Driver:
+    def __init__(self, base_url, replies, timeout, think):
+        self.base_url = base_url
+        self.replies = replies
+        self.timeout = timeout
+        self.think = think
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=1000))
+        self.lock = threading.Lock()
+        self.acks = []
+        self.latencies = []
+        self.timeouts = 0
+        self.errors = 0
+
+    def converse(self, conversation):
+        channel = conversation['channel']
+        user = conversation['user']
+        for n, text in enumerate(conversation['messages']):
+            if channel == 'facebook':
+                url = self.base_url + '/facebook-webhook'
+                body = fb_delivery(user, text, n)
+            else:
+                url = '{}/{}'.format(self.base_url, TELEGRAM_TOKEN)
+                body = telegram_update(user, text, n)
+            seen = self.replies.count(channel, user)
+            start = time.monotonic()
+            try:
+                response = self.session.post(url, json=body,
+                                             timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException:
+                with self.lock:
+                    self.errors += 1
+                return
+            ack = time.monotonic() - start
+            replied = self.replies.wait(channel, user, seen, self.timeout)
+            with self.lock:
+                self.acks.append(ack)
+                if replied:
+                    self.latencies.append(time.monotonic() - start)
+                else:
+                    self.timeouts += 1
+            # the rest of a multi message reply arrives meanwhile
+            time.sleep(self.think)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--conversations', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20,
+                        help='conversations replayed at the same time')
+    parser.add_argument('--channels', default='facebook',
+                        help='comma separated: facebook,telegram')
+    parser.add_argument('--latency-ms', type=float, default=50,
+                        help='latency of every fake service')
+    parser.add_argument('--think-ms', type=float, default=200,
+                        help='pause of a user between two messages')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--mode', default='sync',
+                        help='FB_WEBHOOK_MODE of the app')
+    parser.add_argument('--trace', help='JSON lines trace to replay')
+    parser.add_argument('--save-trace', help='write the trace replayed')
+    parser.add_argument('--database', help='SQLAlchemy url of the app')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--env', action='append', default=[],
+                        help='extra NAME=value for the app, repeatable')
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000.0
+    replies = Replies()
+    graph = FakeServer(GraphAPIHandler, latency, replies).start()
+    telegram = FakeServer(TelegramHandler, latency, replies).start()
+    yandex = FakeServer(YandexHandler, latency).start()
+    dialogflow = FakeDialogflow(latency).start()
+
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    env = {
+        'MySQL_CON_LINE': args.database or 'sqlite:///{}'.format(
+            os.path.join(workdir, 'bench.db')),
+        'MAIL_PORT': os.getenv('MAIL_PORT', '465'),
+        'CELERY_BROKER_URL': 'memory://',
+        'REDIS_URL': '',
+        'LOG_FILE': os.path.join(workdir, 'bench.log'),
+        'FB_PAGE_ACCESS_TOKEN': 'bench',
+        'FB_VERIFY_TOKEN': FB_VERIFY_TOKEN,
+        'FB_GRAPH_URL': graph.url,
+        'FB_WEBHOOK_MODE': args.mode,
+        'TELEGRAM_BOT_TOKEN': TELEGRAM_TOKEN,
+        'TELEGRAM_API_URL': telegram.url + '/bot',
+        'LANGUAGE_DETECTOR': 'yandex',
+        'YANDEX_API_URL': yandex.url + '/api/{version}/tr.json/{endpoint}',
+        'DIALOGFLOW_PROJECT_ID': 'bench',
+        'DIALOGFLOW_API_ENDPOINT': dialogflow.endpoint,
+        'DIALOGFLOW_INSECURE': 'true',
+    }
+    env.update(item.split('=', 1) for item in args.env)
+
+    port = free_port()
+    base_url = 'http://127.0.0.1:{}'.format(port)
+    app_process = multiprocessing.get_context('spawn').Process(
+        target=serve, args=(port, env), daemon=True)
+    app_process.start()
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            requests.get(base_url + '/bench/stats', timeout=1)
+            break
+        except requests.RequestException:
+            if time.monotonic() > deadline or not app_process.is_alive():
+                raise SystemExit('The app did not start, see {}'.format(
+                    env['LOG_FILE']))
+            time.sleep(0.2)
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    else:
+        trace = synthetic_trace(args.conversations,
+                                channels=args.channels.split(','),
+                                seed=args.seed)
+    if args.save_trace:
+        dump_trace(trace, args.save_trace)
+
+    driver = Driver(base_url, replies, args.timeout, args.think_ms / 1000.0)
+    before = requests.get(base_url + '/bench/stats').json()
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(driver.converse, trace))
+    elapsed = time.monotonic() - start
+    after = requests.get(base_url + '/bench/stats').json()
+    queries = after['queries'] - before['queries']
+    lookups = cache_delta(before, after, 'hits') + \
+        cache_delta(before, after, 'misses')
+
+    messages = len(driver.acks)
+    print('mode {} | {} conversations, {} messages in {:.1f}s'.format(
+        args.mode, len(trace), messages, elapsed))
+    print('messages/sec   {:10.1f}'.format(messages / elapsed))
+    print('SQL/message    {:10.1f}'.format(queries / max(messages, 1)))
+    print('language hits  {:9.1f}%'.format(
+        100.0 * cache_delta(before, after, 'hits') / max(lookups, 1)))
+    print('timeouts       {:10d}'.format(driver.timeouts))
+    print('errors         {:10d}'.format(driver.errors))
+    for name, values in (('ack', driver.acks),
+                         ('reply', driver.latencies)):
+        print('{:6} ms  p50 {:8.1f}  p95 {:8.1f}  p99 {:8.1f}'.format(
+            name, *(percentile(values, p) * 1000 for p in (50, 95, 99))))
+
+    app_process.terminate()
+    for fake in (graph, telegram, yandex, dialogflow):
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
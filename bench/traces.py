@@ -0,0 +1,53 @@
+"""Conversation traces replayed by the load driver.
+
+A trace is a list of conversations, each a dict with the `channel`, the
+`user` id and the `messages` the user sends one after the other. Traces
+are generated from the scripts below or read from a JSON lines file
+holding one conversation per line.
+"""
+import json
+import random
+
+# what users send, free text goes to Dialogflow, button titles are
+# matched by the dialog manager
+SCRIPTS = [
+    # manage a booking and get the request mailed to an agent
+    ['Hi', 'Manage a booking', 'Hotel', 'Make changes',
+     'I need a late checkout', 'No', 'ABC123', 'No'],
+    ['Hola', 'Ayuda con mi reserva', 'Vuelo', 'Modificación',
+     'Quiero cambiar la fecha', 'No', 'XYZ789', 'No'],
+    # browse offers
+    ['Hello', 'New reservation', 'Flight+Hotel', 'Thanks'],
+    ['Hola', 'Buscar ofertas', 'Quiero un hotel', 'Gracias'],
+    # ask a question, answered by the follow up
+    ['Hey', 'I have a question', 'Yes'],
+    ['Hola', 'Tengo una consulta', 'Si'],
+    # Dialogflow fallback
+    ['What is the weather like in Madrid', 'Start again'],
+]
+
+
+def synthetic_trace(conversations, channels=('facebook',), seed=0):
+    rng = random.Random(seed)
+    trace = []
+    for i in range(conversations):
+        channel = channels[i % len(channels)]
+        trace.append({
+            'channel': channel,
+            # Facebook PSIDs are 16 digit strings, Telegram chat ids ints
+            'user': str(1000000000000000 + i) if channel == 'facebook'
+            else 100000 + i,
+            'messages': list(rng.choice(SCRIPTS))
+        })
+    return trace
+
+
+def load_trace(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def dump_trace(trace, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for conversation in trace:
+            f.write(json.dumps(conversation, ensure_ascii=False) + '\n')
@@ -0,0 +1,3 @@
+#!/bin/sh
+# schedules the periodic tasks, run a single instance
+celery beat -A app.celery --loglevel=info
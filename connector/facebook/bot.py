@@ -1,12 +1,37 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from urllib.parse import quote
 
 import requests
+from connector.facebook.responses import compile_responses
+from connector.facebook.utils import encode_json
+from core.cache import TieredCache
+from core.dialog.catalog import get_catalog
+from core.lazy import ProcessLocal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from extensions import (
     FB_PAGE_ACCESS_TOKEN,
+    FB_GRAPH_URL,
+    FB_POOL_SIZE,
+    FB_TIMEOUT,
+    FB_MAX_RETRIES,
+    FB_BACKOFF_FACTOR,
+    FB_TYPING_INDICATORS,
+    FB_BATCH_REPLIES,
+    FB_ACTION_WORKERS,
+    FB_PROFILE_CACHE_SIZE,
+    FB_PROFILE_TTL,
+    REDIS_URL,
     LOGGER
 )
 
 DEFAULT_API_VERSION = 2.6
+# requests the Graph API takes in one batch
+BATCH_LIMIT = 50
+# every profile field we use, fetched together and cached
+PROFILE_FIELDS = ['name', 'first_name', 'last_name', 'locale']
 
 
 class NotificationType(Enum):
@@ -15,6 +40,31 @@ class NotificationType(Enum):
     no_push = "NO_PUSH"
 
 
+JSON_HEADERS = {'Content-Type': 'application/json'}
+NOTIFICATION_TYPES = {
+    notification_type: encode_json(notification_type.value)
+    for notification_type in NotificationType
+}
+SENDER_ACTIONS = {
+    action: encode_json({'sender_action': action})
+    for action in ('mark_seen', 'typing_on', 'typing_off')
+}
+
+
+class SendRetry(Retry):
+    """Retries idempotent requests (GET, DELETE, ...) on connection and
+    read errors and on the statuses of the forcelist. POSTs, like the
+    Send API, may have been delivered already when the answer is slow or
+    a 5xx, so they are only retried when they surely were not: on
+    connection errors and 429."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == 'POST':
+            return status_code == 429
+        return super(SendRetry, self).is_retry(method, status_code,
+                                               has_retry_after)
+
+
 class Bot:
     def __init__(self, access_token, **kwargs):
         """
@@ -23,14 +73,66 @@ class Bot:
             @optional:
                 api_version
                 app_secret
+                graph_url: root of the Graph API
+                pool_size: connections kept alive to the Graph API
+                timeout: seconds to wait for the Graph API
+                max_retries: retries of a request, see SendRetry
+                backoff_factor: base of the exponential retry backoff
+                typing_indicators: send mark_seen/typing_on/typing_off
+                    around every reply
+                batch_replies: send the messages of a reply in one
+                    batch request
+                action_workers: threads sending the sender actions
+                profile_ttl: seconds user profiles are cached for
         """
 
         self.api_version = kwargs.get('api_version') or DEFAULT_API_VERSION
         self.app_secret = kwargs.get('app_secret')
-        self.graph_url = 'https://graph.facebook.com/v{0}'.format(
-            self.api_version)
+        self.graph_url = '{0}/v{1}'.format(
+            kwargs.get('graph_url') or FB_GRAPH_URL, self.api_version)
         self.access_token = access_token
         self._auth_args = None
+        self.timeout = kwargs.get('timeout') or FB_TIMEOUT
+        self.session = self.create_session(
+            pool_size=kwargs.get('pool_size') or FB_POOL_SIZE,
+            max_retries=kwargs.get('max_retries', FB_MAX_RETRIES),
+            backoff_factor=kwargs.get('backoff_factor', FB_BACKOFF_FACTOR)
+        )
+        self.typing_indicators = kwargs.get('typing_indicators',
+                                            FB_TYPING_INDICATORS)
+        self.batch_replies = kwargs.get('batch_replies', FB_BATCH_REPLIES)
+        self.action_workers = kwargs.get('action_workers') or \
+            FB_ACTION_WORKERS
+        self.actions_executor = ProcessLocal(lambda: ThreadPoolExecutor(
+            max_workers=self.action_workers,
+            thread_name_prefix='fb-actions'
+        ))
+        self.profiles = TieredCache(
+            prefix='fb-profile:',
+            maxsize=FB_PROFILE_CACHE_SIZE,
+            ttl=kwargs.get('profile_ttl') or FB_PROFILE_TTL,
+            redis_url=REDIS_URL
+        )
+        self.responses = compile_responses(get_catalog())
+
+    @staticmethod
+    def create_session(pool_size, max_retries, backoff_factor):
+        """Keep-alive session shared by every thread using this bot, so
+        sends reuse pooled TLS connections to graph.facebook.com"""
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=SendRetry(
+                total=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+                raise_on_status=False
+            )
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     @property
     def auth_args(self):
@@ -41,33 +143,170 @@ class Bot:
 
     def send_recipient(self, recipient_id, payload,
                        notification_type=NotificationType.regular):
-        payload['recipient'] = {
-            'id': recipient_id
-        }
-        payload['notification_type'] = notification_type.value
-        return self.send_raw(payload)
+        """Send a payload to the recipient. Only the recipient and the
+        notification type are encoded per call, they are spliced in
+        front of the members of the payload.
+        Input:
+            recipient_id: recipient id to send to
+            payload: request without recipient, as <dict> or as
+                its encode_json bytes
+        Output:
+            Response from API as <dict>
+        """
+        if isinstance(payload, dict):
+            payload = encode_json(payload)
+        members = payload[1:]
+        return self.send_raw(b''.join((
+            b'{"recipient":{"id":',
+            encode_json(recipient_id),
+            b'},"notification_type":',
+            NOTIFICATION_TYPES[notification_type],
+            # an empty payload has no members to separate
+            b',' if members != b'}' else b'',
+            members
+        )))
 
     def send_message(self, recipient_id, message,
                      notification_type=NotificationType.regular):
-        self.send_action(
-            recipient_id=recipient_id,
-            action='mark_seen'
-        )
+        """Only the message itself is awaited, the sender actions around
+        it are sent in the background. The message is a <dict> or its
+        encode_json bytes."""
+        return self.send_messages(recipient_id, [message],
+                                  notification_type)[0]
 
-        self.send_action(
-            recipient_id=recipient_id,
-            action='typing_on'
+    def send_messages(self, recipient_id, messages,
+                      notification_type=NotificationType.regular):
+        """Send the messages of a reply in order, with the sender actions
+        around them sent in the background. With batch_replies, two or
+        more messages go in a single Graph API batch request.
+        Input:
+            recipient_id: recipient id to send to
+            messages: list of messages as <dict> or encode_json bytes
+        Output:
+            List of responses from API as <dict>, one per message
+        """
+        messages = [encode_json(message) if isinstance(message, dict)
+                    else message for message in messages]
+        typing = None
+        if self.typing_indicators:
+            typing = self.send_actions_async(
+                recipient_id=recipient_id,
+                actions=['mark_seen', 'typing_on']
+            )
+
+        if self.batch_replies and len(messages) > 1:
+            results = self.send_batch(recipient_id, messages,
+                                      notification_type)
+        else:
+            results = [
+                self.send_recipient(recipient_id,
+                                    b'{"message":' + message + b'}',
+                                    notification_type)
+                for message in messages
+            ]
+
+        if typing is not None:
+            # typing_on may still be in flight, switch it off after it
+            self.send_actions_async(
+                recipient_id=recipient_id,
+                actions=['typing_off'],
+                after=typing
+            )
+        return results
+
+    def send_batch(self, recipient_id, messages,
+                   notification_type=NotificationType.regular):
+        """Send messages through the Graph API batch endpoint. Every
+        message depends on the one before, so they are delivered in
+        order and the ones after a failed message are not sent.
+        https://developers.facebook.com/docs/graph-api/batch-requests
+        Input:
+            recipient_id: recipient id to send to
+            messages: list of encode_json bytes of the messages
+        Output:
+            List of responses from API as <dict>, one per message
+        """
+        fields = 'recipient={0}&notification_type={1}&message='.format(
+            quote(encode_json({'id': recipient_id}), safe=''),
+            notification_type.value
         )
-
-        message_req = self.send_recipient(recipient_id, {
-            'message': message
-        }, notification_type)
-
-        self.send_action(
-            recipient_id=recipient_id,
-            action='typing_off'
+        results = []
+        for start in range(0, len(messages), BATCH_LIMIT):
+            batch = []
+            for i, message in enumerate(
+                    messages[start:start + BATCH_LIMIT], start):
+                item = {
+                    'method': 'POST',
+                    'relative_url': 'me/messages',
+                    'name': 'message{0}'.format(i),
+                    # the response of an item others depend on is left
+                    # out by default
+                    'omit_response_on_success': False,
+                    'body': fields + quote(message, safe='')
+                }
+                if i > start:
+                    item['depends_on'] = 'message{0}'.format(i - 1)
+                batch.append(item)
+            results.extend(self.post_batch(batch))
+        return results
+
+    def post_batch(self, batch):
+        response = self.session.post(
+            '{0}/'.format(self.graph_url),
+            timeout=self.timeout,
+            params=self.auth_args,
+            data={
+                'batch': json.dumps(batch),
+                'include_headers': 'false'
+            }
         )
-        return message_req
+        result = response.json()
+        if not isinstance(result, list):
+            LOGGER.error("Batch API error: %s", result.get('error', result))
+            return [result] * len(batch)
+
+        results = []
+        for item, answer in zip(batch, result):
+            if answer is None:
+                body = {'error': {'message': 'Not run'}}
+            else:
+                try:
+                    body = json.loads(answer.get('body') or '{}')
+                except ValueError:
+                    body = {'error': {'message': answer.get('body')}}
+                if answer.get('code') != 200 and 'error' not in body:
+                    body = {'error': {'code': answer.get('code'),
+                                      'message': answer.get('body')}}
+            if 'error' in body:
+                LOGGER.error("Send API error in batch item %s: %s",
+                             item['name'], body['error'])
+            results.append(body)
+        return results
+
+    def send_actions_async(self, recipient_id, actions, after=None):
+        """Send sender actions in order without blocking the caller.
+        Input:
+            recipient_id: recipient id to send to
+            actions: sender actions to send one after the other
+            after: future to wait for before sending
+        Output:
+            Future of the last response
+        """
+        def send():
+            if after is not None:
+                after.exception()
+            result = None
+            for action in actions:
+                try:
+                    result = self.send_action(
+                        recipient_id=recipient_id,
+                        action=action
+                    )
+                except Exception:
+                    LOGGER.exception("Sender action %s failed", action)
+            return result
+
+        return self.actions_executor.submit(send)
 
     def send_attachment_url(self, recipient_id, attachment_type,
                             attachment_url,
@@ -150,14 +389,17 @@ class Bot:
 
     def send_list_message(self, recipient_id, text, list_items,
                           notification_type=NotificationType.regular):
-
-        self.send_text_message(
-            recipient_id=recipient_id,
-            message=text
-        )
-
-        return self.send_generic_message(recipient_id,
-                                         list_items, notification_type)
+        return self.send_messages(recipient_id, [{
+            'text': text
+        }, {
+            "attachment": {
+                "type": "template",
+                "payload": {
+                    "template_type": "generic",
+                    "elements": list_items
+                }
+            }
+        }], notification_type)[-1]
 
     def send_action(self, recipient_id, action,
                     notification_type=NotificationType.regular):
@@ -171,9 +413,8 @@ class Bot:
         Output:
             Response from API as <dict>
         """
-        return self.send_recipient(recipient_id, {
-            'sender_action': action
-        }, notification_type)
+        payload = SENDER_ACTIONS.get(action) or {'sender_action': action}
+        return self.send_recipient(recipient_id, payload, notification_type)
 
     def send_image_url(self, recipient_id, image_url,
                        notification_type=NotificationType.regular):
@@ -238,33 +479,53 @@ class Bot:
     def get_user_info(self, recipient_id, fields=None):
         """Getting information about the user
         https://developers.facebook.com/docs/messenger-platform/user-profile
+        All PROFILE_FIELDS are fetched in one request and cached, later
+        lookups of the same user are served from the cache.
         Input:
           recipient_id: recipient id to send to
         Output:
           Response from API as <dict>
         """
-        params = {}
-        if fields is not None and isinstance(fields, (list, tuple)):
-            params['fields'] = ",".join(fields)
+        fields = list(fields or [])
+        profile = self.profiles.get(recipient_id)
+        if profile is not None and all(f in profile for f in fields):
+            return profile
+
+        fields = PROFILE_FIELDS + [f for f in fields
+                                   if f not in PROFILE_FIELDS]
+        params = {'fields': ",".join(fields)}
 
         params.update(self.auth_args)
 
         request_endpoint = '{0}/{1}'.format(self.graph_url, recipient_id)
-        response = requests.get(request_endpoint, params=params)
+        response = self.session.get(request_endpoint, params=params,
+                                    timeout=self.timeout)
         if response.status_code == 200:
-            return response.json()
+            profile = response.json()
+            # remember fields the page may not access as well
+            for field in fields:
+                profile.setdefault(field, None)
+            self.profiles.set(recipient_id, profile)
+            return profile
 
         return None
 
     def send_raw(self, payload):
+        """Post a Send API request, given as <dict> or as JSON bytes
+        which are posted as they are."""
+        if isinstance(payload, dict):
+            payload = encode_json(payload)
         request_endpoint = '{0}/me/messages'.format(self.graph_url)
-        response = requests.post(
+        response = self.session.post(
             request_endpoint,
+            timeout=self.timeout,
             params=self.auth_args,
-            json=payload
+            data=payload,
+            headers=JSON_HEADERS
         )
         result = response.json()
-        LOGGER.error(result)
+        if 'error' in result:
+            LOGGER.error("Send API error: %s", result['error'])
         return result
 
     def _send_payload(self, payload):
@@ -283,8 +544,9 @@ class Bot:
           Response from API as <dict>
         """
         request_endpoint = '{0}/me/messenger_profile'.format(self.graph_url)
-        response = requests.post(
+        response = self.session.post(
             request_endpoint,
+            timeout=self.timeout,
             params=self.auth_args,
             json=gs_obj
         )
@@ -304,8 +566,9 @@ class Bot:
           Response from API as <dict>
         """
         request_endpoint = '{0}/me/messenger_profile'.format(self.graph_url)
-        response = requests.post(
+        response = self.session.post(
             request_endpoint,
+            timeout=self.timeout,
             params=self.auth_args,
             json=pm_obj
         )
@@ -321,8 +584,9 @@ class Bot:
         """
         delete_obj = {"fields": ["get_started"]}
         request_endpoint = '{0}/me/messenger_profile'.format(self.graph_url)
-        response = requests.delete(
+        response = self.session.delete(
             request_endpoint,
+            timeout=self.timeout,
             params=self.auth_args,
             json=delete_obj
         )
@@ -338,8 +602,9 @@ class Bot:
         """
         delete_obj = {"fields": ["persistent_menu"]}
         request_endpoint = '{0}/me/messenger_profile'.format(self.graph_url)
-        response = requests.delete(
+        response = self.session.delete(
             request_endpoint,
+            timeout=self.timeout,
             params=self.auth_args,
             json=delete_obj
         )
@@ -368,852 +633,29 @@ class Bot:
             "quick_replies": quick_replies
         }, notification_type)
 
-# ############################## Responses ###############################
-
-    def send_default_error(self, recipient_id, language):
-        if language == 'en':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="I'm sorry I can not solve this question,"
-                        " but I can help you with any of this options.",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'New reservation',
-                        "payload": 'new_reservation'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Manage a booking',
-                        "payload": 'manage_booking'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'I have a question',
-                        "payload": 'question'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Start again',
-                        "payload": 'start again'
-                    },
-                ]
-            )
-        elif language == 'es':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="No puedo resolver esa consulta pero "
-                        "te puedo ayudar con alguna de estas opciones",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Buscar ofertas',
-                        "payload": 'buscar_ofertas'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Tengo una consulta',
-                        "payload": 'tengo_consulta'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Ayuda con mi reserva',
-                        "payload": 'ayuda_reserva'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Empezar de nuevo',
-                        "payload": 'empezar_nuevo'
-                    },
-                ]
-            )
-
-    def send_greeting(self, recipient_id, language):
-        user_info = self.get_user_info(
-            recipient_id=recipient_id,
-            fields=['name']
-        )
-        name = user_info.get('name')
-        if language == 'en':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Hi {name}, I’m Iris, your digital travel agent 🤖."
-                        " I'm here to save you hours of research time and "
-                        "help you to manage your bookings!".format(
-                            name=name
-                        )
-            )
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="What can I do for you?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'New reservation',
-                        "payload": 'new_reservation'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Manage a booking',
-                        "payload": 'manage_booking'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'I have a question',
-                        "payload": 'question'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Start again',
-                        "payload": 'start again'
-                    },
-                ]
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="¡Hola! Soy Iris, el asistente virtual de Destinia "
-            )
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Cuéntame, ¿qué necesitas?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Buscar ofertas',
-                        "payload": 'buscar_ofertas'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Tengo una consulta',
-                        "payload": 'tengo_consulta'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Ayuda con mi reserva',
-                        "payload": 'ayuda_reserva'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Empezar de nuevo',
-                        "payload": 'empezar_nuevo'
-                    },
-                ]
-            )
-
-    def send_thanks_response(self, recipient_id, language):
-        if language == 'en':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Glad to help."
-            )
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="What can I do for you?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'New reservation',
-                        "payload": 'new_reservation'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Manage a booking',
-                        "payload": 'manage_booking'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'I have a question',
-                        "payload": 'question'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Start again',
-                        "payload": 'start again'
-                    },
-                ]
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Encantado de ayudar."
-            )
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Cuéntame, ¿qué necesitas?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Buscar ofertas',
-                        "payload": 'buscar_ofertas'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Tengo una consulta',
-                        "payload": 'tengo_consulta'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Ayuda con mi reserva',
-                        "payload": 'ayuda_reserva'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Empezar de nuevo',
-                        "payload": 'empezar_nuevo'
-                    },
-                ]
-            )
-
-    def send_start_over(self, recipient_id, language):
-        if language == 'en':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="What can I do for you?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'New reservation',
-                        "payload": 'new_reservation'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Manage a booking',
-                        "payload": 'manage_booking'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'I have a question',
-                        "payload": 'question'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Start again',
-                        "payload": 'start again'
-                    },
-                ]
-            )
-        elif language == 'es':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Cuéntame, ¿qué necesitas?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Buscar ofertas',
-                        "payload": 'buscar_ofertas'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Tengo una consulta',
-                        "payload": 'tengo_consulta'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Ayuda con mi reserva',
-                        "payload": 'ayuda_reserva'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Empezar de nuevo',
-                        "payload": 'empezar_nuevo'
-                    },
-                ]
-            )
-
-    def send_new_reservation(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='To get started just tell me what you’re looking for',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/hotels/es",
-                        "title": "Hotel"
-                    },
-                    {
-                        "type": "web_url",
-                        "url": "https://vuelos.destinia.com/",
-                        "title": "Flight"
-                    },
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/vuelo_mas_hotel/",
-                        "title": "Flight+Hotel"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_list_message(
-                recipient_id=recipient_id,
-                text="¡Genial! Dime qué buscas, y "
-                     "encontraré para ti nuestras mejores ofertas",
-                list_items=[
-                    {
-                        "title": "Quiero un hotel",
-                        "subtitle": "Encuentra tu hotel al mejor precio, aquí",
-                        "default_action": {
-                            "type": "web_url",
-                            "url": "https://destinia.com/hotels/es",
-                            "messenger_extensions": False,
-                            "webview_height_ratio": "tall"
-                        }
-                    },
-                    {
-                        "title": "Quiero un vuelo",
-                        "subtitle": "Aquí tienes nuestras mejores"
-                                    " ofertas de vuelos",
-                        "default_action": {
-                            "type": "web_url",
-                            "url": "https://vuelos.destinia.com/",
-                            "messenger_extensions": False,
-                            "webview_height_ratio": "tall"
-                        }
-                    },
-                    {
-                        "title": "Quiero un viaje",
-                        "subtitle": "El viaje de tus sueños"
-                                    ", a tan sólo un clic",
-                        "default_action": {
-                            "type": "web_url",
-                            "url": "https://destinia.com/viajes/",
-                            "messenger_extensions": False,
-                            "webview_height_ratio": "tall"
-                        }
-                    },
-                    {
-                        "title": "Quiero un vuelo + hotel",
-                        "subtitle": "Súper ofertas de vuelo+hotel aquí",
-                        "default_action": {
-                            "type": "web_url",
-                            "url": "https://destinia.com/vuelo_mas_hotel/",
-                            "messenger_extensions": False,
-                            "webview_height_ratio": "tall"
-                        }
-                    }
-                ]
-            )
-
-    def send_new_reservation_hotel(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Click here to find the best hotel deals',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/hotels/es",
-                        "title": "Hotel"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Encuentra tu hotel al mejor precio, aquí',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/hotels/es",
-                        "title": "Quiero un hotel"
-                    }
-                ]
-            )
-
-    def send_new_reservation_viaje(self, recipient_id, language):
-        if language == 'en':
-            self.send_default_error(
-                recipient_id=recipient_id,
-                language=language
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='El viaje de tus sueños, a tan sólo un clic',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/viajes/",
-                        "title": "Quiero un viaje"
-                    }
-                ]
-            )
-
-    def send_new_reservation_flight(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Click here to book your flight at the best price',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://vuelos.destinia.com/",
-                        "title": "Flight"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Aquí tienes nuestras mejores ofertas de vuelos',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://vuelos.destinia.com/",
-                        "title": "Quiero un vuelo"
-                    }
-                ]
-            )
-
-    def send_new_reservation_flight_hotel(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Click here to find our best deals',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/vuelo_mas_hotel/",
-                        "title": "Flight+Hotel"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Súper ofertas de vuelo+hotel aquí',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/vuelo_mas_hotel/",
-                        "title": "Quiero un vuelo + hotel"
-                    }
-                ]
-            )
-
-    def send_manage_booking(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='To get started, I need to know '
-                     'what kind of reservation you have',
-                buttons=[
-                    {
-                        "type": "postback",
-                        "payload": "manage_booking_hotel",
-                        "title": "Hotel"
-                    },
-                    {
-                        "type": "postback",
-                        "payload": "manage_booking_flight",
-                        "title": "Flight"
-                    },
-                    {
-                        "type": "postback",
-                        "payload": "manage_booking_flight_hotel",
-                        "title": "Flight+Hotel"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_list_message(
-                recipient_id=recipient_id,
-                text="Para poder ayudarte necesito saber"
-                     " si tu reserva es de...",
-                list_items=[
-                    {
-                        "title": "Hotel",
-                        "buttons": [{
-                            "type": "postback",
-                            "payload": "manage_booking_hotel",
-                            "title": "Hotel"
-                        }]
-                    },
-                    {
-                        "title": "Vuelo",
-                        "buttons": [{
-                            "type": "postback",
-                            "payload": "manage_booking_flight",
-                            "title": "Vuelo"
-                        }]
-                    },
-                    {
-                        "title": "Viaje",
-                        "buttons": [{
-                            "type": "postback",
-                            "payload": "manage_booking_flight_hotel",
-                            "title": "Viaje"
-                        }]
-                    },
-                    {
-                        "title": "Vuelo + Hotel",
-                        "buttons": [{
-                            "type": "postback",
-                            "payload": "manage_booking_flight_hotel",
-                            "title": "Vuelo + Hotel"
-                        }]
-                    }
-                ]
-            )
-
-    def send_manage_booking_options(self, recipient_id, language):
-        if language == 'en':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Please choose one of these options",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'On spot assistance',
-                        "payload": 'assistance'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'I have a question',
-                        "payload": 'I have a question'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Make changes',
-                        "payload": 'Make changes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Cancellation',
-                        "payload": 'Cancellation'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Start again',
-                        "payload": 'Start again'
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="¿Cómo te podemos ayudar?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Incidencia urgente',
-                        "payload": 'assistance'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Tengo una consulta',
-                        "payload": 'I have a question'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Modificación',
-                        "payload": 'Make changes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Cancelación',
-                        "payload": 'Cancellation'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'Empezar de nuevo',
-                        "payload": 'Empezar de nuevo'
-                    }
-                ]
-            )
-
-    def send_how_can_we_help(self, recipient_id, language):
-        if language == 'en':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="OK! tell me, how can we help?"
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Cuéntame qué necesitas"
-            )
-
-    def send_request_confirmation_number(self, recipient_id, language):
-        if language == 'en':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Ok. What’s your confirmation number?"
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Ok. Dime tu número de reserva"
-            )
-
-    def send_anything_else(self, recipient_id, language):
-        if language == 'en':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Anything else?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Yes',
-                        "payload": 'yes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'No',
-                        "payload": 'no'
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="¿algo más que añadir?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Si',
-                        "payload": 'yes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'no',
-                        "payload": 'no'
-                    }
-                ]
-            )
-
-    def send_ask_another_request(self, recipient_id, language):
-        if language == 'en':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Do you have any other request?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Yes',
-                        "payload": 'yes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'No',
-                        "payload": 'no'
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_quick_replies(
-                recipient_id=recipient_id,
-                message="¿tienes alguna otra petición?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Si',
-                        "payload": 'yes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'No',
-                        "payload": 'no'
-                    }
-                ]
-            )
-
-    def send_have_question(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Check our Help Center, you will find answers '
-                     'to the most common questions of our clients  :)',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/m/faqs",
-                        "title": "Help Center"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text="Échale un ojo a nuestro Centro de ayuda,"
-                     " Aquí están las preguntas más frecuentes de "
-                     "nuestros clientes.",
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/m/faqs",
-                        "title": "Centro de ayuda"
-                    }
-                ]
-            )
-
-    def send_have_flight_question(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Check our Help Center, you will find answers '
-                     'to the most common questions of our clients  :)',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/m/faqs",
-                        "title": "Help Center"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text="Necesito saber si tu pregunta es sobre...",
-                buttons=[
-                    {
-                        "type": "postback",
-                        "title": "facturación online",
-                        "payload": "facturación online"
-                    },
-                    {
-                        "type": "postback",
-                        "title": "Equipaje",
-                        "payload": "Equipaje"
-                    },
-                    {
-                        "type": "postback",
-                        "title": "Otros",
-                        "payload": "Otros"
-                    },
-                ]
-            )
-
-    def send_have_question_equipaje(self, recipient_id, language):
-        if language == 'en':
-            self.send_default_error(
-                recipient_id=recipient_id,
-                language=language
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Durante el proceso de compra se indicará si el"
-                        " billete incluye o no el equipaje. Si quieres incluir"
-            )
-
-    def send_have_question_checkin(self, recipient_id, language):
-        if language == 'en':
-            self.send_default_error(
-                recipient_id=recipient_id,
-                language=language
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="24-48h antes de la salida de tu vuelo te enviaremos "
-                        "un email con un enlace para hacer el check in online "
-                        "y toda la información que necesitas para hacerlo."
-            )
-
-    def send_have_question_otras(self, recipient_id, language):
-        if language == 'en':
-            self.send_default_error(
-                recipient_id=recipient_id,
-                language=language
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text="Échale un ojo a nuestro Centro de ayuda,"
-                     " Aquí están las preguntas más frecuentes de "
-                     "nuestros clientes.",
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://destinia.com/m/faqs",
-                        "title": "Centro de ayuda"
-                    }
-                ]
-            )
-
-    def send_cancel(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='You can cancel your booking'
-                     ' through your account in our website.',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://rebrand.ly/d42457",
-                        "title": "My Account"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Puedes cancelar tu reserva desde el apartado '
-                     'Mi cuenta'
-                     ' en nuestra web',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://rebrand.ly/d42457",
-                        "title": "Mi cuenta"
-                    }
-                ]
-            )
-
-    def send_yes_question_solved(self, recipient_id, language):
-        if language == 'en':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="Great! Just let me know if there's"
-                        " something else that I can do for you :)"
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="¡Genial! Si necesitas algo"
-                        " más sólo tienes que avisarme :)"
-            )
-
-    def send_no_question_solved(self, recipient_id, language):
-        if language == 'en':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Click here to send your question to a booking '
-                     'agent who will answer as soon as possible',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://res.destinia.com/contact/reservations",
-                        "title": "Contact Us"
-                    }
-                ]
-            )
-        elif language == 'es':
-            self.send_button_message(
-                recipient_id=recipient_id,
-                text='Haz clic aquí para enviar tu consulta a un'
-                     ' compañero que contestará a la mayor brevedad posible',
-                buttons=[
-                    {
-                        "type": "web_url",
-                        "url": "https://res.destinia.com/contact/reservations",
-                        "title": "Contactar"
-                    }
-                ]
-            )
-
-    def send_sent_request(self, recipient_id, language):
-        if language == 'en':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="I just sent your request to a booking agent"
-                        " that will reply you as soon as possible."
-            )
-        elif language == 'es':
-            self.send_text_message(
-                recipient_id=recipient_id,
-                message="¡Genial!Ya he enviado tu solicitud. "
-                        "Si necesitas algo más sólo tienes que avisarme :)"
-            )
+    def send_response(self, recipient_id, response, language, full_obj=None):
+        """Send a response of the catalog, compiled when the bot was
+        created.
+        Input:
+            recipient_id: recipient id to send to
+            response: response id in the catalog
+            language: language of the response
+        """
+        messages = self.responses.get((response, language))
+        if messages is None:
+            LOGGER.warning("No %s response in %s", response, language)
+            return
+        profile = None
+        reply = []
+        for message, fields in messages:
+            if fields:
+                if profile is None:
+                    profile = dict.fromkeys(fields)
+                    profile.update(self.get_user_info(
+                        recipient_id=recipient_id,
+                        fields=list(fields)
+                    ) or {})
+                message = dict(message,
+                               text=message['text'].format(**profile))
+            reply.append(message)
+        return self.send_messages(recipient_id, reply)
@@ -0,0 +1,96 @@
+from connector.facebook.utils import encode_json
+from core.dialog.catalog import placeholders
+
+
+def compile_message(message):
+    """Send API messages of a catalog message, the cards of a message
+    follow its text as a generic template.
+    Input:
+        message: channel neutral message of the catalog
+    Output:
+        List of messages as <dict>
+    """
+    text = message['text']
+    if 'quick_replies' in message:
+        return [{
+            'text': text,
+            'quick_replies': [{
+                'content_type': 'text',
+                'title': option['title'],
+                'payload': option['payload']
+            } for option in message['quick_replies']]
+        }]
+    if 'buttons' in message:
+        return [{
+            'attachment': {
+                'type': 'template',
+                'payload': {
+                    'template_type': 'button',
+                    'text': text,
+                    'buttons': [compile_button(button)
+                                for button in message['buttons']]
+                }
+            }
+        }]
+    messages = [{'text': text}]
+    if 'cards' in message:
+        messages.append({
+            'attachment': {
+                'type': 'template',
+                'payload': {
+                    'template_type': 'generic',
+                    'elements': [compile_card(card)
+                                 for card in message['cards']]
+                }
+            }
+        })
+    return messages
+
+
+def compile_button(button):
+    if 'url' in button:
+        return {
+            'type': 'web_url',
+            'url': button['url'],
+            'title': button['title']
+        }
+    return {
+        'type': 'postback',
+        'payload': button['payload'],
+        'title': button['title']
+    }
+
+
+def compile_card(card):
+    element = {'title': card['title']}
+    if 'subtitle' in card:
+        element['subtitle'] = card['subtitle']
+    if 'url' in card:
+        element['default_action'] = {
+            'type': 'web_url',
+            'url': card['url'],
+            'messenger_extensions': False,
+            'webview_height_ratio': 'tall'
+        }
+    else:
+        element['buttons'] = [compile_button(card)]
+    return element
+
+
+def compile_responses(catalog):
+    """
+        @outputs:
+            (response, language) -> list of (message, fields to fill in
+            its text), messages without fields being encoded to JSON
+            bytes already
+    """
+    responses = {}
+    for response, language in catalog.keys():
+        messages = []
+        for message in catalog.messages(response, language, 'facebook'):
+            for compiled in compile_message(message):
+                fields = placeholders(compiled.get('text', ''))
+                messages.append(
+                    (compiled if fields else encode_json(compiled), fields))
+        responses[response, language] = messages
+    return responses
@@ -1,5 +1,6 @@
 import hashlib
 import hmac
+import json
 import six
 
 
@@ -39,4 +40,15 @@ def generate_app_secret_proof(access_token, app_secret):
     else:
         hmac_object = hmac.new(bytearray(app_secret, 'utf8'), str(access_token).encode('utf8'), hashlib.sha256)
     generated_hash = hmac_object.hexdigest()
-    return generated_hash
\ No newline at end of file
+    return generated_hash
+
+
+def encode_json(obj):
+    """
+        @inputs:
+            obj: JSON serializable object
+        @outputs:
+            compact JSON of obj as bytes, ready to be posted or spliced
+            into a larger payload
+    """
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,37 @@
+import threading
+
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+
+
+class KeyboardRegistry:
+    """Serialized InlineKeyboardMarkup of every menu, built once.
+
+    The Bot API takes the reply markup as a JSON string, so a send only
+    looks the string up. The menus of the response catalog are built
+    when the responses are compiled, button lists not known in advance
+    on first use.
+    """
+
+    def __init__(self, menus=(), columns=2):
+        self.columns = columns
+        self._markups = {}
+        self._lock = threading.Lock()
+        for buttons in menus:
+            self.markup(buttons)
+
+    def build(self, buttons):
+        keyboard = [InlineKeyboardButton(b, callback_data=b)
+                    for b in buttons]
+        return InlineKeyboardMarkup([
+            keyboard[i:i + self.columns]
+            for i in range(0, len(keyboard), self.columns)
+        ]).to_json()
+
+    def markup(self, buttons):
+        key = tuple(buttons)
+        markup = self._markups.get(key)
+        if markup is None:
+            markup = self.build(buttons)
+            with self._lock:
+                self._markups[key] = markup
+        return markup
@@ -0,0 +1,47 @@
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+
+from core.dialog.catalog import placeholders
+
+
+def compile_message(message, keyboards):
+    """Bot API messages of a catalog message. Options become inline
+    keyboard buttons whose callback data is their title, links become
+    url buttons.
+    Input:
+        message: channel neutral message of the catalog
+        keyboards: KeyboardRegistry the option keyboards are kept in
+    Output:
+        List of (text, serialized reply markup or None)
+    """
+    text = message['text']
+    options = message.get('quick_replies', []) + \
+        message.get('buttons', []) + message.get('cards', [])
+    if not options:
+        return [(text, None)]
+    if any('url' in option for option in options):
+        markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(option['title'], url=option['url'])
+             if 'url' in option else
+             InlineKeyboardButton(option['title'],
+                                  callback_data=option['title'])]
+            for option in options
+        ]).to_json()
+    else:
+        markup = keyboards.markup([option['title'] for option in options])
+    return [(text, markup)]
+
+
+def compile_responses(catalog, keyboards):
+    """
+        @outputs:
+            (response, language) -> list of (text, reply markup, fields
+            to fill in the text)
+    """
+    responses = {}
+    for response, language in catalog.keys():
+        responses[response, language] = [
+            (text, markup, placeholders(text))
+            for message in catalog.messages(response, language, 'telegram')
+            for text, markup in compile_message(message, keyboards)
+        ]
+    return responses
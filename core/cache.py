@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from extensions import LOGGER
+
+
+class TTLCache:
+    """Thread safe LRU cache whose entries expire `ttl` seconds after they
+    were stored. Pinned entries never expire and are never evicted."""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return self._pinned[key]
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pin(self, items):
+        with self._lock:
+            self._pinned.update(items)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'pinned': len(self._pinned)
+        }
+
+
+class TieredCache:
+    """TTLCache in front of an optional Redis instance, so entries fetched
+    by one process are served to the others as well. Values must be JSON
+    serializable."""
+
+    def __init__(self, prefix, maxsize=1024, ttl=3600, redis_url=None):
+        self.prefix = prefix
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None and self.redis_url:
+            import redis
+            self._redis = redis.StrictRedis.from_url(self.redis_url)
+        return self._redis
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self.prefix + str(key))
+            except Exception:
+                LOGGER.exception("Redis cache read failed")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+                return value
+        return default
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.redis is not None:
+            try:
+                self.redis.setex(self.prefix + str(key), self.ttl,
+                                 json.dumps(value))
+            except Exception:
+                LOGGER.exception("Redis cache write failed")
@@ -0,0 +1,108 @@
+"""Catalog of what the bot says, kept in responses.json next to this
+module and shared by every channel.
+
+Every response id maps to its versions per language. A version is
+either the list of `messages` sent on every channel, a list per channel
+(`facebook`, `telegram`) where the channels word it differently, or
+`{"response": other}` to send another response instead. A message is
+channel neutral:
+
+    text: the text, `{name}` style fields are filled in when sent
+    quick_replies: options the user picks one of, `title` and `payload`
+    menu: name of a list of quick replies under `menus`
+    buttons: links (`title`, `url`) or options (`title`, `payload`)
+        shown under the text
+    cards: items shown after the text, each with a `title`, an optional
+        `subtitle` and a `url` or a `payload`
+
+Options may name the `intent` they stand for when the user sends their
+title back, `{intent}` being the intent which sent the response. The
+languages of the catalog are the languages the bot speaks.
+
+The connectors compile the catalog into their own payloads once, when
+their bot is created.
+"""
+import json
+import os
+from string import Formatter
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), 'responses.json')
+CHANNELS = ('facebook', 'telegram')
+
+_catalog = None
+
+
+class ResponseCatalog:
+    def __init__(self, data):
+        self.menus = data.get('menus', {})
+        self.responses = data['responses']
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def keys(self):
+        for response, versions in self.responses.items():
+            for language in versions:
+                yield response, language
+
+    def languages(self):
+        return sorted({language for _, language in self.keys()})
+
+    def messages(self, response, language, channel):
+        """
+            @outputs:
+                channel neutral messages of the response, None when it
+                has no version in that language
+        """
+        version = self.responses.get(response, {}).get(language)
+        if version is None:
+            return None
+        if 'response' in version:
+            return self.messages(version['response'], language, channel)
+        messages = version.get(channel, version.get('messages'))
+        if messages is None:
+            raise ValueError('Response {} has no {} version for {}'.format(
+                response, language, channel))
+        return [self.resolve(message, language) for message in messages]
+
+    def resolve(self, message, language):
+        if 'menu' not in message:
+            return message
+        message = dict(message)
+        message['quick_replies'] = self.menus[message.pop('menu')][language]
+        return message
+
+    def options(self, response, language):
+        """Options of the response on any channel, links included"""
+        options = []
+        for channel in CHANNELS:
+            for message in self.messages(response, language, channel) or ():
+                options.extend(message.get('quick_replies', []) +
+                               message.get('buttons', []) +
+                               message.get('cards', []))
+        return options
+
+    def button_titles(self):
+        """Titles of the options sent on any channel, which come back to
+        us as the user's message, as language -> titles."""
+        titles = {}
+        for response, language in self.keys():
+            found = titles.setdefault(language, [])
+            for option in self.options(response, language):
+                if 'url' not in option and option['title'] not in found:
+                    found.append(option['title'])
+        return titles
+
+
+def placeholders(text):
+    """Names of the fields to fill in `text`"""
+    return {name for _, name, _, _ in Formatter().parse(text) if name}
+
+
+def get_catalog():
+    global _catalog
+    if _catalog is None:
+        _catalog = ResponseCatalog.load()
+    return _catalog
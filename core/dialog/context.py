@@ -0,0 +1,123 @@
+from sqlalchemy.exc import IntegrityError
+
+from models import User, Request, Session, State, db
+
+
+class ConversationContext:
+    """Everything the dialog manager needs to know about the sender of
+    one inbound message.
+
+    The user and its state are loaded with a single joined query, state
+    changes are only recorded on the loaded rows and `commit` writes them
+    all back at the end of the message.
+    """
+
+    def __init__(self, user, user_state, channel, recipient_id,
+                 full_obj=None):
+        self.user = user
+        self.user_state = user_state
+        self.channel = channel
+        self.recipient_id = recipient_id
+        self.full_obj = full_obj
+        self._latest_session = None
+
+    @classmethod
+    def load(cls, source_user_id, channel, full_obj=None):
+        # user_source_id is a string column, comparing it to a string
+        # keeps the (source, user_source_id) index usable
+        key = str(source_user_id)
+        row = cls._query(key, channel).first()
+        if row is None:
+            user = User(user_source_id=key, source=channel)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(user)
+                    # the Dialogflow session is keyed on the user id
+                    db.session.flush()
+            except IntegrityError:
+                # created meanwhile by another worker, a locking read
+                # sees its row past the transaction's snapshot
+                row = cls._query(key, channel).with_for_update().one()
+        if row is None:
+            user_state = None
+        else:
+            user, user_state = row
+        if user_state is None:
+            user_state = State(state='IDLE', user=user)
+            db.session.add(user_state)
+        return cls(user, user_state, channel, source_user_id, full_obj)
+
+    @staticmethod
+    def _query(source_user_id, channel):
+        return db.session.query(User, State).outerjoin(
+            State, State.user_id == User.id
+        ).filter(
+            User.source == channel,
+            User.user_source_id == source_user_id
+        )
+
+    @property
+    def state(self):
+        return self.user_state.state
+
+    @state.setter
+    def state(self, new_state):
+        self.user_state.state = new_state
+
+    @property
+    def last_lang(self):
+        return self.user_state.last_lang
+
+    @last_lang.setter
+    def last_lang(self, new_lang):
+        self.user_state.last_lang = new_lang
+
+    @property
+    def task_id(self):
+        return self.user_state.task_id
+
+    @task_id.setter
+    def task_id(self, task_id):
+        self.user_state.task_id = task_id
+
+    @property
+    def last_intent(self):
+        return self.user_state.last_intent
+
+    @last_intent.setter
+    def last_intent(self, intent):
+        self.user_state.last_intent = intent
+
+    @property
+    def latest_session(self):
+        if self._latest_session is None:
+            self._latest_session = Session.query.filter_by(
+                user_id=self.user.id
+            ).order_by(
+                Session.created_at.desc()
+            ).first()
+        return self._latest_session
+
+    def create_session(self, department):
+        session = Session(
+            confirmation_number=None,
+            department=department,
+            user=self.user
+        )
+        db.session.add(session)
+        self._latest_session = session
+        return session
+
+    def create_request(self, request):
+        request = Request(request=request, user=self.user,
+                          session=self.latest_session)
+        db.session.add(request)
+        return request
+
+    @staticmethod
+    def commit():
+        db.session.commit()
+
+    @staticmethod
+    def rollback():
+        db.session.rollback()
@@ -0,0 +1,139 @@
+import queue
+import threading
+import zlib
+from collections import OrderedDict
+
+from core.lazy import ProcessLocal
+from extensions import LOGGER
+
+
+class MessageDispatcher:
+    """Hands inbound messages over to background workers so the webhook
+    can acknowledge a delivery as soon as it has been validated.
+
+    mode:
+        sync: process the message inline (previous behaviour)
+        local: push the message to one of `workers` in-process lanes,
+            each drained by its own thread
+        celery: enqueue `task` on the `messages.<lane>` Celery queue, to
+            be consumed by a single-concurrency worker per lane
+            (see laneworker.sh)
+
+    Messages are assigned to a lane by hashing the sender id, so the
+    messages of one user are handled strictly in order while different
+    users are processed in parallel.
+
+    Repeated deliveries are dropped by message id. With `redis_url` the
+    ids seen are shared by every process for `seen_ttl` seconds,
+    otherwise only the last `seen_size` ids of the process are known.
+    """
+
+    def __init__(self, app, handler, mode='sync', workers=4, task=None,
+                 seen_size=10000, redis_url=None, seen_ttl=3600):
+        if workers < 1:
+            raise ValueError('At least one lane is needed, got {}'.format(
+                workers))
+        self.app = app
+        self.handler = handler
+        self.mode = mode
+        self.workers = workers
+        self.task = task
+        self.seen_size = seen_size
+        self.seen = OrderedDict()
+        self.seen_ttl = seen_ttl
+        self.redis = None
+        if redis_url:
+            import redis
+            self.redis = redis.StrictRedis.from_url(redis_url)
+        self.lock = threading.Lock()
+        self.lanes = ProcessLocal(self.start_lanes)
+
+    def is_duplicate(self, message_id):
+        """Facebook retries a delivery it did not get a timely answer for,
+        possibly to another worker, so remember the message ids and drop
+        repeats."""
+        if message_id is None:
+            return False
+        if self.redis is not None:
+            try:
+                # SET NX succeeds for the first delivery only
+                return not self.redis.set(self.seen_key(message_id), 1,
+                                          nx=True, ex=self.seen_ttl)
+            except Exception:
+                # rather handle a repeat than lose the message
+                LOGGER.exception("Could not check delivery %s", message_id)
+                return False
+        with self.lock:
+            if message_id in self.seen:
+                return True
+            self.seen[message_id] = True
+            if len(self.seen) > self.seen_size:
+                self.seen.popitem(last=False)
+        return False
+
+    def forget(self, message_id):
+        """Accept the next delivery of a message we failed to take in"""
+        if message_id is None:
+            return
+        if self.redis is not None:
+            try:
+                self.redis.delete(self.seen_key(message_id))
+            except Exception:
+                LOGGER.exception("Could not forget delivery %s", message_id)
+            return
+        with self.lock:
+            self.seen.pop(message_id, None)
+
+    @staticmethod
+    def seen_key(message_id):
+        return 'seen-message:{}'.format(message_id)
+
+    def lane_for(self, key):
+        # crc32 rather than hash() so every process agrees on the lane
+        return zlib.crc32(str(key).encode('utf-8')) % self.workers
+
+    def submit(self, message_id, lane_key, *args):
+        if self.is_duplicate(message_id):
+            LOGGER.info("Duplicate delivery %s dropped", message_id)
+            return False
+        try:
+            self.dispatch(lane_key, args)
+        except Exception:
+            # Facebook redelivers what the webhook failed on
+            self.forget(message_id)
+            raise
+        return True
+
+    def dispatch(self, lane_key, args):
+        if self.mode == 'celery':
+            self.task.apply_async(
+                args=list(args),
+                queue='messages.{}'.format(self.lane_for(lane_key))
+            )
+        elif self.mode == 'local':
+            self.lanes.get()[self.lane_for(lane_key)].put(args)
+        else:
+            self.handler(*args)
+
+    def start_lanes(self):
+        lanes = [queue.Queue() for _ in range(self.workers)]
+        for i, lane in enumerate(lanes):
+            thread = threading.Thread(
+                target=self._work,
+                args=(lane,),
+                name='dispatcher-lane-{}'.format(i),
+                daemon=True
+            )
+            thread.start()
+        return lanes
+
+    def _work(self, lane):
+        while True:
+            args = lane.get()
+            try:
+                with self.app.app_context():
+                    self.handler(*args)
+            except Exception:
+                LOGGER.exception("Failed to process message")
+            finally:
+                lane.task_done()
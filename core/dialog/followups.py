@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+import uuid
+
+from core.lazy import ProcessLocal
+from extensions import LOGGER
+
+# claims the due entries and their payloads in one step, so a schedule
+# of the same key in between can not lose its payload
+POP_DUE = """
+local keys = redis.call('ZRANGEBYSCORE', KEYS[1], 0, ARGV[1],
+                        'LIMIT', 0, ARGV[2])
+local payloads = {}
+for _, key in ipairs(keys) do
+    local payload = redis.call('HGET', KEYS[2], key)
+    redis.call('ZREM', KEYS[1], key)
+    redis.call('HDEL', KEYS[2], key)
+    if payload then
+        table.insert(payloads, payload)
+    end
+end
+return payloads
+"""
+# takes or renews the poller lease, returns 1 when `token` holds it
+LEAD = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+
+class RedisFollowUpStore:
+    """Deadlines kept in a Redis sorted set shared by every process,
+    the payloads in a hash next to it."""
+
+    def __init__(self, redis_url, name='follow-ups'):
+        import redis
+        self.redis = redis.StrictRedis.from_url(redis_url)
+        self.deadlines = name
+        self.payloads = name + ':payloads'
+        self.poller = name + ':poller'
+        self._pop_due = self.redis.register_script(POP_DUE)
+        self._lead = self.redis.register_script(LEAD)
+
+    def schedule(self, key, due, payload):
+        pipe = self.redis.pipeline()
+        pipe.hset(self.payloads, key, json.dumps(payload))
+        pipe.zadd(self.deadlines, {key: due})
+        pipe.execute()
+
+    def cancel(self, key):
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.deadlines, key)
+        pipe.hdel(self.payloads, key)
+        pipe.execute()
+
+    def pop_due(self, now, limit=100):
+        payloads = self._pop_due(keys=[self.deadlines, self.payloads],
+                                 args=[now, limit])
+        return [json.loads(payload) for payload in payloads]
+
+    def lead(self, token, ttl):
+        """Whether `token` is the poller, for `ttl` seconds from now"""
+        return bool(self._lead(keys=[self.poller],
+                               args=[token, int(ttl * 1000)]))
+
+
+class FollowUpScheduler:
+    """Schedules the "question solved?" follow up of a user.
+
+    Scheduling, rescheduling and cancelling only update the user's
+    deadline in the store. Every process runs a poller thread, started
+    with the Celery workers and the dialog manager, but only the one
+    holding the store's lease polls: it hands the due follow ups to
+    `dispatch(recipient_id, language, channel)`. Another process takes
+    over when the lease expires.
+    """
+
+    def __init__(self, store, dispatch, poll_interval=1.0):
+        self.store = store
+        self.dispatch = dispatch
+        self.poll_interval = poll_interval
+        self.lease = max(5.0, poll_interval * 5)
+        self.poller = ProcessLocal(self.start_poller)
+        self._token = None
+
+    @staticmethod
+    def key(channel, recipient_id):
+        return '{}:{}'.format(channel, recipient_id)
+
+    def schedule(self, recipient_id, language, channel, delay):
+        """
+            @outputs:
+                key of the follow up, to be given to `cancel`
+        """
+        self.start()
+        key = self.key(channel, recipient_id)
+        self.store.schedule(key, time.time() + delay,
+                            [recipient_id, language, channel])
+        return key
+
+    def cancel(self, key):
+        self.start()
+        self.store.cancel(key)
+
+    def start(self):
+        self.poller.get()
+
+    def start_poller(self):
+        self._token = uuid.uuid4().hex
+        thread = threading.Thread(
+            target=self._poll,
+            name='follow-up-poller',
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _poll(self):
+        while True:
+            try:
+                if self.store.lead(self._token, self.lease):
+                    for payload in self.store.pop_due(time.time()):
+                        self.dispatch(*payload)
+            except Exception:
+                LOGGER.exception("Failed to dispatch follow ups")
+            time.sleep(self.poll_interval)
+
+
+class CeleryFollowUps:
+    """Follow ups as Celery countdown tasks, cancelled by revoking the
+    task on every worker. Used when no Redis is configured."""
+
+    def __init__(self, task):
+        self.task = task
+
+    def start(self):
+        # the countdown tasks need no poller
+        pass
+
+    def schedule(self, recipient_id, language, channel, delay):
+        """
+            @outputs:
+                id of the task, to be given to `cancel`
+        """
+        return self.task.apply_async(
+            args=[recipient_id, language, channel],
+            countdown=delay
+        ).task_id
+
+    def cancel(self, key):
+        from celery import current_app
+        current_app.control.revoke(key, terminate=True)
+
+
+def build_follow_ups(task, redis_url=None, poll_interval=1.0):
+    if redis_url:
+        return FollowUpScheduler(
+            store=RedisFollowUpStore(redis_url),
+            dispatch=task.delay,
+            poll_interval=poll_interval
+        )
+    return CeleryFollowUps(task)
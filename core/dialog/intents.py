@@ -0,0 +1,200 @@
+"""Declarative description of what the bot does for every Dialogflow
+intent. It is shared by all channels.
+
+Every intent maps to the list of actions that are run in order:
+    respond: send the named response of the catalog (responses.json)
+    state: move the user to another conversation state
+    session: open a new session for a department and wait for the
+        first request
+    report: mail the latest session to the booking agents
+    follow_up: ask later whether the question was solved, optionally
+        only for the given languages
+"""
+
+import re
+import unicodedata
+
+from core.dialog.catalog import placeholders
+
+REPORT = ('report', None)
+
+
+def respond(response):
+    return ('respond', response)
+
+
+def transition(state):
+    return ('state', state)
+
+
+def open_session(department):
+    return ('session', department)
+
+
+def follow_up(*languages):
+    return ('follow_up', languages)
+
+
+def booking_flow(intent, department):
+    """Intents of a manage booking option which collects requests and a
+    confirmation number before reporting to an agent."""
+    return {
+        intent: [
+            open_session(department),
+            respond('how_can_we_help')
+        ],
+        intent + ' - yes': [
+            transition('WAIT_FIRST_REQUEST'),
+            respond('how_can_we_help')
+        ],
+        intent + ' - no': [
+            transition('WAIT_CONFIRMATION_NUMBER'),
+            respond('request_confirmation_number')
+        ],
+        intent + ' - no - yes': [
+            transition('WAIT_SECOND_REQUEST'),
+            respond('how_can_we_help')
+        ],
+        intent + ' - no - no': [
+            REPORT,
+            respond('sent_request')
+        ],
+    }
+
+
+def question_flow(intent, response, *languages):
+    return {
+        intent: [
+            respond(response),
+            follow_up(*languages)
+        ],
+        intent + ' - yes': [respond('yes_question_solved')],
+        intent + ' - no': [respond('no_question_solved')],
+    }
+
+
+INTENTS = {
+    'Default Fallback Intent': [respond('default_error')],
+    'greeting': [respond('greeting')],
+    'thanks': [respond('thanks_response')],
+    'start_again': [respond('start_over')],
+    'new_reservation': [respond('new_reservation')],
+    'new_reservation.hotel': [respond('new_reservation_hotel')],
+    'new_reservation.flight': [respond('new_reservation_flight')],
+    'new_reservation.flight_hotel': [
+        respond('new_reservation_flight_hotel')
+    ],
+    'new_reservation - viaje': [respond('new_reservation_viaje')],
+    'manage_booking': [respond('manage_booking')],
+    'manage_booking.hotel': [respond('manage_booking_options')],
+    'manage_booking.flight': [respond('manage_booking_options')],
+    'manage_booking.flight_hotel': [respond('manage_booking_options')],
+    'manage_booking.hotel.cancel': [
+        respond('cancel'),
+        follow_up()
+    ],
+    'manage_booking.hotel.cancel - yes': [
+        respond('yes_question_solved')
+    ],
+    'manage_booking.hotel.cancel - no': [
+        respond('no_question_solved')
+    ],
+    'manage_booking.flight.question - equipaje': [
+        respond('have_question_equipaje')
+    ],
+    'manage_booking.flight.question - checkin': [
+        respond('have_question_checkin')
+    ],
+}
+INTENTS.update(question_flow('question', 'have_question'))
+INTENTS.update(question_flow('manage_booking.hotel.question',
+                             'have_question'))
+INTENTS.update(question_flow('manage_booking.flight_hotel.question',
+                             'have_question'))
+# the spanish flight question asks for a topic first
+INTENTS.update(question_flow('manage_booking.flight.question',
+                             'have_flight_question', 'en'))
+INTENTS.update(question_flow('manage_booking.flight.question - otras',
+                             'have_question_otras'))
+for option in ('make_changes', 'on_spot_assistance'):
+    INTENTS.update(booking_flow(
+        'manage_booking.hotel.' + option, 'Hotel'))
+for option in ('cancel', 'make_changes', 'on_spot_assistance'):
+    INTENTS.update(booking_flow(
+        'manage_booking.flight.' + option, 'Flight'))
+    INTENTS.update(booking_flow(
+        'manage_booking.flight_hotel.' + option, 'Flight+Hotel'))
+
+
+def compile_intents(intents, actions):
+    """
+        @inputs:
+            intents: intent name -> list of (action, argument)
+            actions: action name -> callable(context, language, argument)
+        @outputs:
+            intent name -> tuple of (callable, argument), ready to be run
+            for a prediction with a single dict lookup
+    """
+    compiled = {}
+    for intent, steps in intents.items():
+        compiled[intent] = tuple(
+            (actions[action], argument) for action, argument in steps
+        )
+    return compiled
+
+
+# menu whose options answer the `<intent> - yes` and `<intent> - no`
+# follow ups, by their payload
+ANSWER_MENU = 'yes_no'
+
+
+def normalize(text):
+    # "Vuelo + Hotel" and "Vuelo+hotel" are the same button, so are
+    # "Cancelación" and "Cancelacion"
+    text = ''.join(
+        char for char in unicodedata.normalize('NFKD', text)
+        if not unicodedata.combining(char)
+    )
+    return re.sub(r'\s*\+\s*', '+', " ".join(text.lower().split()))
+
+
+def compile_buttons(intents, catalog):
+    """
+        @inputs:
+            intents: intent registry, the options of the responses an
+                intent sends stand for the intent they name. Options
+                naming it without `{intent}` are valid after any intent.
+            catalog: ResponseCatalog, the options of its ANSWER_MENU
+                answer the `<intent> - yes` and `<intent> - no` follow ups
+        @outputs:
+            (previous intent or None, normalized text) -> intent
+    """
+    compiled = {}
+    for parent, steps in intents.items():
+        for action, response in steps:
+            if action != 'respond':
+                continue
+            for language in catalog.languages():
+                for option in catalog.options(response, language):
+                    if 'intent' not in option:
+                        continue
+                    intent = option['intent'].format(intent=parent)
+                    if intent not in intents:
+                        raise ValueError(
+                            'Option {} of {} stands for unknown intent {}'
+                            .format(option['title'], response, intent))
+                    key = parent if placeholders(option['intent']) else None
+                    compiled[(key, normalize(option['title']))] = intent
+    answers = {}
+    for options in catalog.menus[ANSWER_MENU].values():
+        for option in options:
+            answers.setdefault(option['payload'], set()).add(
+                normalize(option['title']))
+    for intent in intents:
+        for answer, texts in answers.items():
+            suffix = ' - ' + answer
+            if intent.endswith(suffix):
+                parent = intent[:-len(suffix)]
+                for text in texts:
+                    compiled[(parent, text)] = intent
+    return compiled
@@ -0,0 +1,42 @@
+import os
+import threading
+
+
+class ProcessLocal:
+    """Proxy to the object built by `factory` on first use, once per
+    process.
+
+    Objects holding sockets, gRPC channels or threads must not be
+    inherited across a fork, a child process builds its own instance the
+    first time it is used there.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._instance = self._factory()
+                    self._pid = pid
+        return self._instance
+
+    def peek(self):
+        """The instance of this process, None if not built yet"""
+        if self._pid == os.getpid():
+            return self._instance
+        return None
+
+    def reset(self):
+        """Drop the instance, the next use builds a new one"""
+        with self._lock:
+            self._instance = None
+            self._pid = None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,56 @@
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+
+from core.lazy import ProcessLocal
+
+
+class ProcessQueueHandler(QueueHandler):
+    """Hands records to a queue drained by a writer thread, so logging
+    never waits on file I/O in the request path.
+
+    The writer thread does not survive a fork, it is started in every
+    process the first time that process logs. Records are formatted by
+    the writer thread, not by the thread logging them.
+    """
+
+    def __init__(self, *handlers):
+        super().__init__(queue.Queue(-1))
+        self.target_handlers = handlers
+        self.listener = ProcessLocal(self.start)
+
+    def enqueue(self, record):
+        self.listener.get()
+        self.queue.put_nowait(record)
+
+    def prepare(self, record):
+        return record
+
+    def start(self):
+        # records queued by the parent are not ours to write
+        self.queue = queue.Queue(-1)
+        listener = QueueListener(self.queue, *self.target_handlers,
+                                 respect_handler_level=True)
+        listener.start()
+        return listener
+
+    def close(self):
+        # called by logging.shutdown at exit, writes what is queued
+        listener = self.listener.peek()
+        if listener is not None:
+            self.listener.reset()
+            listener.stop()
+        super().close()
+
+
+class SamplingFilter:
+    """Lets through `rate` of the records, warnings and errors always."""
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate
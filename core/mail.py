@@ -0,0 +1,39 @@
+class ReportTemplate:
+    """Report mail rendered from a template compiled once per process.
+
+    Everything outside the `blocks` of the html template is rendered a
+    single time, each mail only renders the blocks holding its data and
+    joins them with the static parts. The plain text alternative is
+    rendered from the same data.
+    """
+
+    BLOCKS = ('name', 'session_row', 'request_rows')
+    MARKER = '\x00'
+
+    def __init__(self, jinja_env, html_name, text_name):
+        self.html = jinja_env.get_template(html_name)
+        self.text = jinja_env.get_template(text_name)
+        # the html template with a marker in place of every block
+        skeleton = jinja_env.from_string(
+            '{% extends "' + html_name + '" %}' + ''.join(
+                '{% block ' + block + ' %}' + self.MARKER + '{% endblock %}'
+                for block in self.BLOCKS
+            )
+        ).render()
+        self.static = skeleton.split(self.MARKER)
+        if len(self.static) != len(self.BLOCKS) + 1:
+            raise ValueError(
+                "{} must use each of the blocks {} exactly once".format(
+                    html_name, ', '.join(self.BLOCKS)))
+
+    def render(self, **data):
+        """
+            @outputs:
+                (html, plain text)
+        """
+        context = self.html.new_context(data)
+        parts = [self.static[0]]
+        for block, static in zip(self.BLOCKS, self.static[1:]):
+            parts.extend(self.html.blocks[block](context))
+            parts.append(static)
+        return ''.join(parts), self.text.render(**data)
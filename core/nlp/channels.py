@@ -0,0 +1,72 @@
+import itertools
+
+import dialogflow_v2 as dialogflow
+import grpc
+from google.api_core import grpc_helpers
+
+DIALOGFLOW_SCOPES = (
+    'https://www.googleapis.com/auth/cloud-platform',
+    'https://www.googleapis.com/auth/dialogflow',
+)
+
+
+class DialogflowClients:
+    """Dialogflow sessions, contexts and intents clients sharing a pool
+    of `size` gRPC channels, handed out round robin.
+
+    A channel multiplexes concurrent calls over one HTTP/2 connection,
+    keepalive pings keep it warm between messages. Channels must not be
+    shared across a fork, build one instance per process (see
+    core.lazy.ProcessLocal).
+    """
+
+    def __init__(self, endpoint, size=2, keepalive_ms=30000,
+                 keepalive_timeout_ms=10000, insecure=False):
+        options = [
+            ('grpc.keepalive_time_ms', keepalive_ms),
+            ('grpc.keepalive_timeout_ms', keepalive_timeout_ms),
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.http2.max_pings_without_data', 0),
+            # otherwise identical channels share one connection
+            ('grpc.use_local_subchannel_pool', 1),
+        ]
+        self.channels = [
+            self.create_channel(endpoint, options, insecure)
+            for _ in range(max(1, size))
+        ]
+        self.sessions_clients = [
+            dialogflow.SessionsClient(channel=channel)
+            for channel in self.channels
+        ]
+        self.contexts_clients = [
+            dialogflow.ContextsClient(channel=channel)
+            for channel in self.channels
+        ]
+        self.intents_clients = [
+            dialogflow.IntentsClient(channel=channel)
+            for channel in self.channels
+        ]
+        self._counter = itertools.count()
+
+    @staticmethod
+    def create_channel(endpoint, options, insecure=False):
+        if insecure:
+            # local stand-ins only, no credentials are sent
+            return grpc.insecure_channel(endpoint, options=options)
+        return grpc_helpers.create_channel(
+            endpoint,
+            scopes=DIALOGFLOW_SCOPES,
+            options=options
+        )
+
+    def _pick(self, clients):
+        return clients[next(self._counter) % len(clients)]
+
+    def sessions(self):
+        return self._pick(self.sessions_clients)
+
+    def contexts(self):
+        return self._pick(self.contexts_clients)
+
+    def intents(self):
+        return self._pick(self.intents_clients)
@@ -0,0 +1,91 @@
+from extensions import LOGGER
+
+
+class LanguageDetector:
+    """Interface of the language identification backends."""
+
+    def detect(self, text):
+        """
+            @inputs:
+                text: text to identify
+            @outputs:
+                (language code, confidence between 0 and 1)
+        """
+        raise NotImplementedError
+
+
+class YandexDetector(LanguageDetector):
+    def __init__(self, api_key, api_url=None):
+        from yandex_translate import YandexTranslate
+        self.translate = YandexTranslate(api_key)
+        if api_url:
+            # formatted with the api version and endpoint
+            self.translate.api_url = api_url
+
+    def detect(self, text):
+        return self.translate.detect(text), 1.0
+
+
+class FastTextDetector(LanguageDetector):
+    """In process identification with a fastText language model such as
+    lid.176.bin / lid.176.ftz."""
+
+    def __init__(self, model_path):
+        import fasttext
+        self.model = fasttext.load_model(model_path)
+
+    def detect(self, text):
+        # fastText predicts one line at a time
+        labels, probabilities = self.model.predict(
+            " ".join(text.split()), k=1)
+        if not labels:
+            return None, 0.0
+        return labels[0].replace('__label__', ''), float(probabilities[0])
+
+
+class FallbackDetector(LanguageDetector):
+    """Uses `primary` and asks `fallback` only when the primary prediction
+    is less confident than `threshold`."""
+
+    def __init__(self, primary, fallback, threshold=0.6):
+        self.primary = primary
+        self.fallback = fallback
+        self.threshold = threshold
+
+    def detect(self, text):
+        language, confidence = self.primary.detect(text)
+        if confidence >= self.threshold:
+            return language, confidence
+        LOGGER.info("Low confidence %s for %s, falling back",
+                    confidence, language)
+        try:
+            return self.fallback.detect(text)
+        except Exception:
+            LOGGER.exception("Fallback language detection failed")
+            return language, confidence
+
+
+def build_detector(backend, model_path=None, api_key=None,
+                   fallback=None, threshold=0.6, api_url=None):
+    """
+        @inputs:
+            backend: fasttext or yandex
+            model_path: fastText model, required by the fasttext backend
+            api_key: Yandex Translate key
+            api_url: Yandex Translate url template, default to the
+                public API
+            fallback: yandex to ask Yandex on low confidence predictions
+            threshold: confidence under which the fallback is used
+        @outputs:
+            LanguageDetector
+    """
+    if backend == 'fasttext':
+        detector = FastTextDetector(model_path)
+        if fallback == 'yandex':
+            detector = FallbackDetector(
+                primary=detector,
+                fallback=YandexDetector(api_key, api_url),
+                threshold=threshold
+            )
+        return detector
+    return YandexDetector(api_key, api_url)
@@ -1,9 +1,13 @@
 import os
+import time
 from dotenv import load_dotenv
 import dialogflow_v2 as dialogflow
 from guess_language import guess_language
-from yandex_translate import YandexTranslate
 
+from core.cache import TTLCache
+from core.lazy import ProcessLocal
+from core.nlp.channels import DialogflowClients
+from core.nlp.detectors import build_detector
 from extensions import LOGGER
 
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -13,13 +17,44 @@ dot_env_path = os.path.join(os.path.dirname(__file__),
 load_dotenv(dot_env_path)
 
 DIALOGFLOW_PROJECT_ID = os.getenv('DIALOGFLOW_PROJECT_ID')
+DIALOGFLOW_API_ENDPOINT = os.getenv('DIALOGFLOW_API_ENDPOINT',
+                                    'dialogflow.googleapis.com:443')
+DIALOGFLOW_INSECURE = os.getenv('DIALOGFLOW_INSECURE', 'false') == 'true'
+DIALOGFLOW_CHANNELS = int(os.getenv('DIALOGFLOW_CHANNELS', 2))
+DIALOGFLOW_KEEPALIVE_MS = int(os.getenv('DIALOGFLOW_KEEPALIVE_MS', 30000))
+DIALOGFLOW_KEEPALIVE_TIMEOUT_MS = int(
+    os.getenv('DIALOGFLOW_KEEPALIVE_TIMEOUT_MS', 10000))
 PRETRAINED_MODEL_PATH = os.getenv('PRETRAINED_MODEL_PATH')
+YANDEX_API_KEY = os.getenv(
+    'YANDEX_API_KEY',
+    'trnsl.1.1.20200215T104617Z.e985952a7c20d3fc.45cea67a739d4bbe0d98177bb452'
+    '7b84b0857455'
+)
+YANDEX_API_URL = os.getenv('YANDEX_API_URL')
+# fasttext when a pretrained model is available, yandex otherwise
+LANGUAGE_DETECTOR = os.getenv(
+    'LANGUAGE_DETECTOR', 'fasttext' if PRETRAINED_MODEL_PATH else 'yandex')
+LANGUAGE_FALLBACK = os.getenv('LANGUAGE_FALLBACK', 'yandex')
+LANGUAGE_CONFIDENCE_THRESHOLD = float(
+    os.getenv('LANGUAGE_CONFIDENCE_THRESHOLD', 0.6))
+LANGUAGE_CACHE_SIZE = int(os.getenv('LANGUAGE_CACHE_SIZE', 10000))
+LANGUAGE_CACHE_TTL = int(os.getenv('LANGUAGE_CACHE_TTL', 24 * 3600))
+# seconds between the debug log lines of the language cache counters
+LANGUAGE_CACHE_STATS_INTERVAL = int(
+    os.getenv('LANGUAGE_CACHE_STATS_INTERVAL', 60))
 
 
 class NLPEngine:
-    def __init__(self):
-        self.session_client = dialogflow.SessionsClient()
-        self.session_context = dialogflow.ContextsClient()
+    def __init__(self, languages=('en', 'es')):
+        # clients and detector are built on first use in each process,
+        # after the server forked its workers
+        self.clients = ProcessLocal(lambda: DialogflowClients(
+            endpoint=DIALOGFLOW_API_ENDPOINT,
+            size=DIALOGFLOW_CHANNELS,
+            keepalive_ms=DIALOGFLOW_KEEPALIVE_MS,
+            keepalive_timeout_ms=DIALOGFLOW_KEEPALIVE_TIMEOUT_MS,
+            insecure=DIALOGFLOW_INSECURE
+        ))
         self.neutral_words = [
             "bot",
             "chatbot",
@@ -34,9 +69,58 @@ class NLPEngine:
             "ey",
             "si"
         ]
-        self.translate = YandexTranslate('trnsl.1.1.20200215T104617Z.e985952a7'
-                                         'c20d3fc.45cea67a739d4bbe0d98177bb452'
-                                         '7b84b0857455')
+        self.detector = ProcessLocal(lambda: build_detector(
+            backend=LANGUAGE_DETECTOR,
+            model_path=PRETRAINED_MODEL_PATH,
+            api_key=YANDEX_API_KEY,
+            api_url=YANDEX_API_URL,
+            fallback=LANGUAGE_FALLBACK,
+            threshold=LANGUAGE_CONFIDENCE_THRESHOLD
+        ))
+        self.language_cache = TTLCache(
+            maxsize=LANGUAGE_CACHE_SIZE,
+            ttl=LANGUAGE_CACHE_TTL
+        )
+        self._stats_logged = time.monotonic()
+        self.shortcut_intents = ProcessLocal(self.list_shortcut_intents)
+        # languages the bot answers in, others fall back to the last one
+        self.languages = tuple(languages)
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.lower().split())
+
+    def seed_languages(self, titles):
+        """Pin the language of texts we know in advance, like the titles
+        of the buttons we send, `titles` being language -> texts.
+        Texts found under more than one language are left out."""
+        languages = {}
+        for language, texts in titles.items():
+            for text in texts:
+                key = self.normalize(text)
+                if languages.get(key, language) != language:
+                    languages[key] = None
+                else:
+                    languages[key] = language
+        self.language_cache.pin({
+            key: language for key, language in languages.items()
+            if language is not None
+        })
+
+    def detect(self, text):
+        key = self.normalize(text)
+        language = self.language_cache.get(key)
+        if language is None:
+            language = self.detector.detect(text)[0]
+            self.language_cache.set(key, language)
+        self.log_cache_stats()
+        return language
+
+    def log_cache_stats(self):
+        now = time.monotonic()
+        if now - self._stats_logged >= LANGUAGE_CACHE_STATS_INTERVAL:
+            self._stats_logged = now
+            LOGGER.debug("Language cache %s", self.language_cache.stats)
 
     def detect_language(self, text, last_lang='es', current_locale='es'):
         locale = self.get_current_locale(current_locale)
@@ -55,8 +139,8 @@ class NLPEngine:
                 return "es"
             else:
                 try:
-                    language = self.translate.detect(text)
-                    if language in ['en', 'es']:
+                    language = self.detect(text)
+                    if language in self.languages:
                         return language
                     elif last_lang is not None:
                         return last_lang
@@ -65,8 +149,8 @@ class NLPEngine:
                 except Exception:
                     return last_lang
         try:
-            language = self.translate.detect(text)
-            if language in ['en', 'es']:
+            language = self.detect(text)
+            if language in self.languages:
                 return language
             elif last_lang is not None:
                 return last_lang
@@ -75,14 +159,11 @@ class NLPEngine:
         except Exception:
             return last_lang
 
-    @staticmethod
-    def get_current_locale(locale):
-        if locale.startswith("en"):
-            return "en"
-        elif locale.startswith("es"):
-            return "es"
-        else:
-            return None
+    def get_current_locale(self, locale):
+        for language in self.languages:
+            if locale.startswith(language):
+                return language
+        return None
 
     def predict(self, user_id, message, last_lang='es', current_locale='es'):
         language = self.detect_language(message, last_lang, current_locale)
@@ -98,24 +179,72 @@ class NLPEngine:
     
         Using the same `user_id` between requests allows continuation
         of the conversation."""
-        LOGGER.info(user_id)
-        LOGGER.info(language_code)
-        LOGGER.info(text)
-        session = self.session_client.session_path(DIALOGFLOW_PROJECT_ID, user_id)
-        context = self.session_context.session_path(DIALOGFLOW_PROJECT_ID, user_id)
+        LOGGER.debug("Detect intent for %s (%s): %s",
+                     user_id, language_code, text)
+        session_client = self.clients.sessions()
+        session = session_client.session_path(DIALOGFLOW_PROJECT_ID, user_id)
         text_input = dialogflow.types.TextInput(
             text=text, language_code=language_code)
     
         query_input = dialogflow.types.QueryInput(text=text_input)
     
-        response = self.session_client.detect_intent(
+        response = session_client.detect_intent(
             session=session, query_input=query_input)
         intent = response.query_result.intent.display_name
-        if intent.endswith("- no - no") or intent.endswith(".question - yes")\
-                or intent.endswith(".question - no") or intent.endswith(
-                ".hotel.cancel - yes") or\
-                intent.endswith(".hotel.cancel - no"):
-            LOGGER.info("Context Clear")
-            self.session_context.delete_all_contexts(context)
+        if self.clears_contexts(intent):
+            self.clear_contexts(user_id)
     
         return intent, language_code
+
+    def list_shortcut_intents(self):
+        """
+            @outputs:
+                intent name -> whether it resets the contexts, for the
+                intents of the agent which set no output contexts
+        """
+        intents_client = self.clients.intents()
+        parent = intents_client.project_agent_path(DIALOGFLOW_PROJECT_ID)
+        return {
+            intent.display_name: intent.reset_contexts
+            for intent in intents_client.list_intents(
+                parent,
+                intent_view=dialogflow.enums.IntentView.INTENT_VIEW_FULL
+            )
+            if not intent.output_contexts
+        }
+
+    def shortcut(self, user_id, intent):
+        """Stand in for Dialogflow matching `intent`, for a button we
+        sent. Only intents setting no output contexts can be matched
+        without Dialogflow, the contexts of the others are needed by the
+        messages that follow.
+            @outputs:
+                whether the intent was matched without Dialogflow
+        """
+        try:
+            resets = self.shortcut_intents.get().get(intent)
+        except Exception:
+            LOGGER.exception("Failed to list the Dialogflow intents")
+            return False
+        if resets is None:
+            return False
+        if resets or self.clears_contexts(intent):
+            self.clear_contexts(user_id)
+        return True
+
+    @staticmethod
+    def clears_contexts(intent):
+        """Whether `intent` ends a conversation branch, after which the
+        Dialogflow contexts of the user are dropped."""
+        return intent.endswith("- no - no") or \
+            intent.endswith(".question - yes") or \
+            intent.endswith(".question - no") or \
+            intent.endswith(".hotel.cancel - yes") or \
+            intent.endswith(".hotel.cancel - no")
+
+    def clear_contexts(self, user_id):
+        LOGGER.debug("Context Clear")
+        session_context = self.clients.contexts()
+        context = session_context.session_path(DIALOGFLOW_PROJECT_ID,
+                                               user_id)
+        session_context.delete_all_contexts(context)
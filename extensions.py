@@ -1,22 +1,35 @@
 import os
 import logging
+from logging.handlers import WatchedFileHandler
 
 from dotenv import load_dotenv
 
+from core.logs import ProcessQueueHandler, SamplingFilter
 
+# the log settings may come from .env as well
+dot_env_path = os.path.join(os.path.dirname(__file__),
+                            os.path.join(os.getcwd(), '.env'))
+load_dotenv(dot_env_path)
+
+LOG_FILE = os.getenv('LOG_FILE', 'logfile.log')
+# share of the full webhook payloads written to the log
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 0.01))
+
+# every process appends to the file, rotate it with logrotate, the
+# handler reopens it once it has been moved
+_log_file_handler = WatchedFileHandler(LOG_FILE, encoding='utf-8')
+_log_file_handler.setFormatter(logging.Formatter(
+    fmt='%(levelname)s: %(message)s',
+    datefmt='%m-%d %H:%M'
+))
 logging.basicConfig(
-    handlers=[logging.FileHandler('logfile.log', 'w', 'utf-8')],
-    format='%(levelname)s: %(message)s',
-    datefmt='%m-%d %H:%M',
-    level=getattr(logging, os.getenv('LOG_LEVEL', 'DEBUG'))
+    handlers=[ProcessQueueHandler(_log_file_handler)],
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO'))
 )
 
 LOGGER = logging.getLogger(__name__)
-
-
-dot_env_path = os.path.join(os.path.dirname(__file__),
-                            os.path.join(os.getcwd(), '.env'))
-load_dotenv(dot_env_path)
+PAYLOAD_LOGGER = logging.getLogger(__name__ + '.payloads')
+PAYLOAD_LOGGER.addFilter(SamplingFilter(LOG_PAYLOAD_SAMPLE_RATE))
 
 RabbitMQ_CON_LINE = os.getenv("RabbitMQ_CON_LINE")
 FB_PAGE_ACCESS_TOKEN = os.getenv("FB_PAGE_ACCESS_TOKEN")
@@ -24,4 +37,33 @@ FB_VERIFY_TOKEN = os.getenv("FB_VERIFY_TOKEN")
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_BOT_NAME = os.getenv('TELEGRAM_BOT_NAME')
 TELEGRAM_ENDPOINT_URL = os.getenv('TELEGRAM_ENDPOINT_URL')
+# API roots, overridden to talk to local stand-ins (see bench/)
+FB_GRAPH_URL = os.getenv('FB_GRAPH_URL', 'https://graph.facebook.com')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
 
+FB_WEBHOOK_MODE = os.getenv('FB_WEBHOOK_MODE', 'sync')
+MESSAGE_LANES = int(os.getenv('MESSAGE_LANES', 4))
+FB_POOL_SIZE = int(os.getenv('FB_POOL_SIZE', 20))
+FB_TIMEOUT = float(os.getenv('FB_TIMEOUT', 10))
+FB_MAX_RETRIES = int(os.getenv('FB_MAX_RETRIES', 3))
+FB_BACKOFF_FACTOR = float(os.getenv('FB_BACKOFF_FACTOR', 0.3))
+FB_TYPING_INDICATORS = os.getenv('FB_TYPING_INDICATORS', 'true') == 'true'
+# send the messages of a reply as one Graph API batch request
+FB_BATCH_REPLIES = os.getenv('FB_BATCH_REPLIES', 'true') == 'true'
+FB_ACTION_WORKERS = int(os.getenv('FB_ACTION_WORKERS', 8))
+FB_PROFILE_CACHE_SIZE = int(os.getenv('FB_PROFILE_CACHE_SIZE', 10000))
+FB_PROFILE_TTL = int(os.getenv('FB_PROFILE_TTL', 24 * 3600))
+REDIS_URL = os.getenv('REDIS_URL')
+TELEGRAM_POOL_SIZE = int(os.getenv('TELEGRAM_POOL_SIZE', 20))
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', 5))
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', 10))
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', 3))
+# longest flood control wait we sit out instead of failing the send
+TELEGRAM_MAX_RETRY_AFTER = float(os.getenv('TELEGRAM_MAX_RETRY_AFTER', 30))
+FOLLOW_UP_DELAY = int(os.getenv('FOLLOW_UP_DELAY', 60))
+FOLLOW_UP_POLL_INTERVAL = float(os.getenv('FOLLOW_UP_POLL_INTERVAL', 1))
+REPORT_MAIL_WINDOW = int(os.getenv('REPORT_MAIL_WINDOW', 5))
+REPORT_MAIL_BATCH = int(os.getenv('REPORT_MAIL_BATCH', 100))
+REPORT_MAIL_ATTEMPTS = int(os.getenv('REPORT_MAIL_ATTEMPTS', 3))
+# seconds between the beat sweeps of the report queue
+REPORT_MAIL_SWEEP = int(os.getenv('REPORT_MAIL_SWEEP', 300))
@@ -0,0 +1,4 @@
+#!/bin/sh
+# usage: laneworker.sh <lane>
+# one worker per lane so messages of a user are processed in order
+celery worker -A app.celery -Q messages.$1 --concurrency=1 -n lane$1@%h --loglevel=info
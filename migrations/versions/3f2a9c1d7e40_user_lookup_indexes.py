@@ -0,0 +1,33 @@
+"""user lookup indexes
+
+Revision ID: 3f2a9c1d7e40
+Revises:
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # fails if a user was stored twice for the same channel, such
+    # duplicates have to be merged before upgrading
+    op.create_index('ix_user_source_user_source_id', 'user',
+                    ['source', 'user_source_id'], unique=True)
+    op.create_index(op.f('ix_state_user_id'), 'state', ['user_id'],
+                    unique=False)
+    op.create_index('ix_session_user_id_created_at', 'session',
+                    ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_session_user_id_created_at', table_name='session')
+    op.drop_index(op.f('ix_state_user_id'), table_name='state')
+    op.drop_index('ix_user_source_user_source_id', table_name='user')
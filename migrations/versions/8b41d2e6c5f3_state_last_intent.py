@@ -0,0 +1,25 @@
+"""state last intent
+
+Revision ID: 8b41d2e6c5f3
+Revises: 3f2a9c1d7e40
+Create Date: 2026-10-18 14:03:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41d2e6c5f3'
+down_revision = '3f2a9c1d7e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('state', sa.Column('last_intent', sa.Text(),
+                                     nullable=True))
+
+
+def downgrade():
+    op.drop_column('state', 'last_intent')
@@ -39,6 +39,10 @@ class Admin(db.Model, UserMixin):
 
 
 class User(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_source_user_source_id',
+                 'source', 'user_source_id', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_source_id = db.Column(db.String(256))
     source = db.Column(db.String(256))
@@ -74,6 +78,9 @@ class Request(db.Model):
 
 
 class Session(db.Model):
+    __table_args__ = (
+        db.Index('ix_session_user_id_created_at', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     requests = db.relationship('Request', backref='session', lazy='dynamic')
@@ -88,13 +95,7 @@ class Session(db.Model):
     @property
     def serialize(self):
         """Return object data in easily serializable format"""
-        return {
-            'id': self.id,
-            'confirmation_number': self.confirmation_number,
-            'department': self.department,
-            'created_at': dump_datetime(self.created_at),
-            'requests': self.serialize_requests
-        }
+        return Session.serialize_all([self])[0]
 
     @property
     def serialize_requests(self):
@@ -104,13 +105,35 @@ class Session(db.Model):
         """
         return [item.serialize for item in self.requests]
 
+    @staticmethod
+    def serialize_all(sessions):
+        """
+        Serialize sessions like `serialize`, loading the requests of
+        all of them with a single query.
+        """
+        requests = {s.id: [] for s in sessions}
+        if requests:
+            rows = Request.query.filter(
+                Request.session_id.in_(list(requests))
+            ).order_by(Request.session_id, Request.id)
+            for item in rows:
+                requests[item.session_id].append(item.serialize)
+        return [{
+            'id': s.id,
+            'confirmation_number': s.confirmation_number,
+            'department': s.department,
+            'created_at': dump_datetime(s.created_at),
+            'requests': requests[s.id]
+        } for s in sessions]
+
 
 class State(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
     state = db.Column(db.TEXT())
     last_lang = db.Column(db.TEXT())
     task_id = db.Column(db.TEXT(), default=None)
+    last_intent = db.Column(db.TEXT(), default=None)
     created_at = db.Column(db.DateTime, index=True, default=datetime.utcnow)
 
     def __repr__(self):
@@ -127,6 +150,7 @@ class UserModelView(ModelView):
     can_view_details = True
     column_searchable_list = ['source']
     column_filters = ['source']
+    sessions_page_size = 20
 
     column_formatters = dict(user_source_id=lambda v, c, m, p: Markup(
         u"<a href=" + str(m.id) + ">" + m.user_source_id + "</a>"))
@@ -140,12 +164,21 @@ class UserModelView(ModelView):
         user = User.query.filter_by(id=int(id)).first()
         if user is None:
             return redirect(url_for('security.login', next=request.url))
-        sessions = Session.query.filter_by(user_id=user.id).order_by(
-            Session.created_at.desc()
+        query = Session.query.filter_by(user_id=user.id)
+        num_pages = max(1, -(-query.count() // self.sessions_page_size))
+        page = min(max(0, request.args.get('page', 0, type=int)),
+                   num_pages - 1)
+        sessions = query.order_by(
+            Session.created_at.desc(), Session.id.desc()
+        ).offset(page * self.sessions_page_size).limit(
+            self.sessions_page_size
         ).all()
-        serialized_sessions = [s.serialize for s in sessions]
+        serialized_sessions = Session.serialize_all(sessions)
         return self.render('analytics_index.html', user=user,
-                           sessions=serialized_sessions)
+                           sessions=serialized_sessions,
+                           page=page, num_pages=num_pages,
+                           pager_url=lambda p: url_for(
+                               '.list_view', id=user.id, page=p))
 
     def is_accessible(self):
         return (current_user.is_active and
@@ -1,19 +1,35 @@
 from flask import request, render_template, redirect
 import telegram
 from core.dialog.manager import DialogManger
+from core.dialog.dispatcher import MessageDispatcher
+from core.lazy import ProcessLocal
 from extensions import (
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_ENDPOINT_URL,
     FB_VERIFY_TOKEN,
-    LOGGER
+    FB_WEBHOOK_MODE,
+    MESSAGE_LANES,
+    REDIS_URL,
+    LOGGER,
+    PAYLOAD_LOGGER
 )
 from connector.telegram.bot import Bot as Telegram_Bot
+from tasks import process_incoming_message
 from app import app
 
-dialog_manager = DialogManger()
-telegram_bot = Telegram_Bot(
-    access_token=TELEGRAM_BOT_TOKEN
+# built on first use, once per worker process
+dialog_manager = ProcessLocal(DialogManger)
+fb_dispatcher = MessageDispatcher(
+    app=app,
+    handler=lambda *args: dialog_manager.process_message(*args),
+    mode=FB_WEBHOOK_MODE,
+    workers=MESSAGE_LANES,
+    task=process_incoming_message,
+    redis_url=REDIS_URL
 )
+telegram_bot = ProcessLocal(lambda: Telegram_Bot(
+    access_token=TELEGRAM_BOT_TOKEN
+))
 
 
 @app.route('/')
@@ -30,11 +46,11 @@ def respond():
     if update.message is not None:
 
         chat_id = update.message.chat.id
-        LOGGER.info("got chat :" + str(update.message.chat))
+        LOGGER.debug("got chat: %s", update.message.chat)
         # Telegram understands UTF-8, so encode text for unicode compatibility
         message = update.message.text
         # for debugging purposes only
-        LOGGER.info("got text message :" + message)
+        LOGGER.debug("got text message: %s", message)
         dialog_manager.process_message(
             message,
             chat_id,
@@ -50,7 +66,7 @@ def respond():
         # Telegram understands UTF-8, so encode text for unicode compatibility
         message = update.callback_query.data
         # for debugging purposes only
-        LOGGER.info("got text message :" + message)
+        LOGGER.debug("got text message: %s", message)
         dialog_manager.process_message(
             message,
             chat_id,
@@ -88,25 +104,41 @@ def fb_webhook():
 
     if request.method == 'POST':
         output = request.get_json()
-        LOGGER.info(output)
-        for event in output['entry']:
-            messaging = event['messaging']
-            for x in messaging:
-                LOGGER.info(x)
-                if x.get('message'):
-                    recipient_id = str(x['sender']['id'])
-                    if x['message'].get('text'):
-                        message = x['message']['text']
-                        dialog_manager.process_message(
-                            message,
-                            recipient_id,
-                            'facebook')
-
-                elif x.get('postback'):
-                    recipient_id = str(x['sender']['id'])
-                    if x['postback'].get('title'):
-                        message = x['postback']['title']
-                        dialog_manager.process_message(message,
-                                                       recipient_id,
-                                                       'facebook')
+        PAYLOAD_LOGGER.info("Facebook delivery: %s", output)
+        for message_id, recipient_id, message in iter_fb_messages(output):
+            fb_dispatcher.submit(
+                message_id,
+                recipient_id,
+                message,
+                recipient_id,
+                'facebook'
+            )
         return "Success"
+
+
+def iter_fb_messages(output):
+    """
+        @inputs:
+            output: Facebook webhook delivery
+        @outputs:
+            (message_id, recipient_id, text) for every messaging item
+            that carries a text message or a postback title
+    """
+    for event in (output or {}).get('entry', []):
+        for x in event.get('messaging', []):
+            sender = x.get('sender', {}).get('id')
+            if sender is None:
+                continue
+            recipient_id = str(sender)
+            message_id = '{}:{}'.format(recipient_id, x.get('timestamp'))
+            if x.get('message'):
+                if x['message'].get('text'):
+                    yield (x['message'].get('mid', message_id),
+                           recipient_id,
+                           x['message']['text'])
+
+            elif x.get('postback'):
+                if x['postback'].get('title'):
+                    yield (x['postback'].get('mid', message_id),
+                           recipient_id,
+                           x['postback']['title'])
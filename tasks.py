@@ -1,87 +1,242 @@
+import json
+import smtplib
+import uuid
+
 from app import celery, mail, app
 from connector.facebook.bot import Bot as FBot
+from celery.signals import worker_process_init
 from connector.telegram.bot import Bot as TelegramBot
-from flask import render_template
+from core.dialog.followups import build_follow_ups
+from core.lazy import ProcessLocal
+from core.mail import ReportTemplate
 from flask_mail import Message
 from extensions import (FB_PAGE_ACCESS_TOKEN,
-                        TELEGRAM_BOT_TOKEN
+                        TELEGRAM_BOT_TOKEN,
+                        REDIS_URL,
+                        FOLLOW_UP_POLL_INTERVAL,
+                        REPORT_MAIL_WINDOW,
+                        REPORT_MAIL_BATCH,
+                        REPORT_MAIL_ATTEMPTS,
+                        REPORT_MAIL_SWEEP,
+                        LOGGER
                         )
 
-fb_bot = FBot(
+fb_bot = ProcessLocal(lambda: FBot(
     access_token=FB_PAGE_ACCESS_TOKEN
-)
-telegram_bot = TelegramBot(
+))
+telegram_bot = ProcessLocal(lambda: TelegramBot(
     access_token=TELEGRAM_BOT_TOKEN
-)
+))
+
+REPORT_QUEUE = 'report-mails'
+REPORT_PROCESSING = 'report-mails:processing'
+REPORT_FLUSH_FLAG = 'report-mails:flush'
+REPORT_FLUSH_LOCK = 'report-mails:lock'
+REPORT_FLUSH_LOCK_TTL = 120
+# the flush lock holds the token of its flush, which alone may renew or
+# release it
+RENEW_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_redis = None
+_report_template = None
+
+
+def get_redis():
+    global _redis
+    if _redis is None and REDIS_URL:
+        import redis
+        _redis = redis.StrictRedis.from_url(REDIS_URL)
+    return _redis
+
+
+def get_report_template():
+    global _report_template
+    if _report_template is None:
+        _report_template = ReportTemplate(app.jinja_env,
+                                          'email/mail_temp.html',
+                                          'email/mail_temp.txt')
+    return _report_template
+
+
+@worker_process_init.connect
+def compile_report_template(**kwargs):
+    get_report_template()
 
 
 @celery.task
 def send_ask_question_solved(recipient_id, language, channel):
-    if language == 'en':
-        if channel == 'facebook':
-            fb_bot.send_quick_replies(
-                recipient_id=recipient_id,
-                message="Have been your question solved?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Yes',
-                        "payload": 'yes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'No',
-                        "payload": 'no'
-                    }
-                ]
-            )
-        elif channel == 'telegram':
-            telegram_bot.send_keyboard_message(
-                recipient_id=recipient_id,
-                message="Have been your question solved?",
-                buttons=[
-                    "Yes",
-                    "No"
-                ]
-            )
-    elif language == 'es':
-        if channel == 'facebook':
-            fb_bot.send_quick_replies(
-                recipient_id=recipient_id,
-                message="¿Has resuelto tu duda?",
-                quick_replies=[
-                    {
-                        "content_type": 'text',
-                        "title": 'Si',
-                        "payload": 'yes'
-                    },
-                    {
-                        "content_type": 'text',
-                        "title": 'No',
-                        "payload": 'no'
-                    }
-                ]
-            )
-        elif channel == 'telegram':
-            telegram_bot.send_keyboard_message(
-                recipient_id=recipient_id,
-                message="¿Has resuelto tu duda?",
-                buttons=[
-                    "Si",
-                    "No"
-                ]
-            )
+    bots = {'facebook': fb_bot, 'telegram': telegram_bot}
+    bots[channel].send_response(
+        recipient_id=recipient_id,
+        response='ask_question_solved',
+        language=language
+    )
+
+
+follow_ups = build_follow_ups(
+    task=send_ask_question_solved,
+    redis_url=REDIS_URL,
+    poll_interval=FOLLOW_UP_POLL_INTERVAL
+)
+
+
+@worker_process_init.connect
+def start_follow_ups(**kwargs):
+    # due follow ups are sent even while no user writes to the bot
+    follow_ups.start()
+
+
+@celery.task(bind=True, max_retries=REPORT_MAIL_ATTEMPTS - 1)
+def send_report_mail(self, recipient_id, language, channel, session,
+                     requests, name):
+    """Queue the report, pending reports are mailed together by
+    flush_report_mails at most REPORT_MAIL_WINDOW seconds later."""
+    report = {
+        'channel': channel,
+        'session': session,
+        'requests': requests,
+        'name': name,
+        'attempts': 0
+    }
+    redis = get_redis()
+    if redis is None:
+        _, failed = deliver_reports([report])
+        if failed:
+            raise self.retry(countdown=REPORT_MAIL_WINDOW)
+        return
+    redis.lpush(REPORT_QUEUE, json.dumps(report))
+    schedule_report_flush(redis)
+
+
+def schedule_report_flush(redis):
+    # only one flush is pending at a time
+    if redis.set(REPORT_FLUSH_FLAG, 1, nx=True,
+                 ex=REPORT_MAIL_WINDOW * 10):
+        flush_report_mails.apply_async(countdown=REPORT_MAIL_WINDOW)
+
+
+@celery.task
+def flush_report_mails():
+    """Mail a batch of queued reports. Reports are moved to a processing
+    list while they are mailed and only removed from it once delivered,
+    reports left there by a flush which died are mailed by the next."""
+    redis = get_redis()
+    if redis is None:
+        return
+    token = uuid.uuid4().hex
+    if not redis.set(REPORT_FLUSH_LOCK, token, nx=True,
+                     ex=REPORT_FLUSH_LOCK_TTL):
+        # another flush is running, try again after it
+        flush_report_mails.apply_async(countdown=REPORT_MAIL_WINDOW)
+        return
+    renew_lock = redis.register_script(RENEW_LOCK)
+
+    def renew():
+        try:
+            return bool(renew_lock(keys=[REPORT_FLUSH_LOCK],
+                                   args=[token, REPORT_FLUSH_LOCK_TTL]))
+        except Exception:
+            LOGGER.exception("Could not renew the report mail lock")
+            return False
+
+    try:
+        redis.delete(REPORT_FLUSH_FLAG)
+        claimed = redis.lrange(REPORT_PROCESSING, 0, -1)
+        while len(claimed) < REPORT_MAIL_BATCH:
+            report = redis.rpoplpush(REPORT_QUEUE, REPORT_PROCESSING)
+            if report is None:
+                break
+            claimed.append(report)
+
+        reports = [json.loads(report) for report in claimed]
+        delivered, failed = deliver_reports(reports, renew=renew)
+        delivered = {id(report) for report in delivered}
+        failed = {id(report) for report in failed}
+        for raw, report in zip(claimed, reports):
+            if id(report) not in delivered and id(report) not in failed:
+                # not mailed since the lock was lost, left to its owner
+                continue
+            pipe = redis.pipeline()
+            pipe.lrem(REPORT_PROCESSING, 1, raw)
+            if id(report) in failed:
+                report['attempts'] += 1
+                if report['attempts'] < REPORT_MAIL_ATTEMPTS:
+                    pipe.lpush(REPORT_QUEUE, json.dumps(report))
+                else:
+                    LOGGER.error("Giving up report mail for %s",
+                                 report['name'])
+            pipe.execute()
+    finally:
+        redis.register_script(RELEASE_LOCK)(keys=[REPORT_FLUSH_LOCK],
+                                            args=[token])
+    if redis.llen(REPORT_QUEUE):
+        schedule_report_flush(redis)
+
+
+# picks up reports whose scheduled flush was lost
+celery.add_periodic_task(REPORT_MAIL_SWEEP, flush_report_mails.s(),
+                         name='sweep report mails')
+
+
+def deliver_reports(reports, renew=None):
+    """
+        @inputs:
+            reports: reports to mail over a single SMTP connection
+            renew: called before every mail, delivery stops once it
+                returns False
+        @outputs:
+            (delivered reports, reports which could not be delivered),
+            the reports left when delivery stopped are in neither
+    """
+    pending = list(reports)
+    delivered = []
+    failed = []
+    with app.app_context():
+        try:
+            with mail.connect() as connection:
+                while pending:
+                    if renew is not None and not renew():
+                        LOGGER.warning("Report mail delivery stopped")
+                        break
+                    try:
+                        connection.send(build_report_message(pending[0]))
+                        delivered.append(pending[0])
+                    except smtplib.SMTPServerDisconnected:
+                        raise
+                    except Exception:
+                        LOGGER.exception("Report mail delivery failed")
+                        failed.append(pending[0])
+                    pending.pop(0)
+        except Exception:
+            LOGGER.exception("SMTP connection failed")
+            failed.extend(pending)
+    return delivered, failed
+
+
+def build_report_message(report):
+    html, text = get_report_template().render(session=report['session'],
+                                              requests=report['requests'],
+                                              channel=report['channel'],
+                                              name=report['name'])
+    return Message(subject="Report - {}".format(report['name']),
+                   sender='destinachatbot@tqniatlab.com',
+                   recipients=['destiniachatbot@tqniat.com'],
+                   body=text,
+                   html=html)
 
 
 @celery.task
-def send_report_mail(recipient_id, language, channel, session, requests, name):
+def process_incoming_message(message, source_user_id, channel):
+    from routes import dialog_manager
     with app.app_context():
-        msg = Message(subject="Report - {}".format(name),
-                      sender='destinachatbot@tqniatlab.com',
-                      recipients=['destiniachatbot@tqniat.com'],
-                      html=render_template('email/mail_temp.html',
-                                           session=session,
-                                           requests=requests,
-                                           channel=channel,
-                                           name=name))
-        mail.send(msg)
+        dialog_manager.process_message(message, source_user_id, channel)